@@ -5,7 +5,8 @@ if platform != "win32":
 
     install()
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from asyncio import Lock, new_event_loop, set_event_loop
+from asyncio import Lock, Semaphore, new_event_loop, set_event_loop
+from collections import OrderedDict
 from logging import (
     getLogger,
     FileHandler,
@@ -41,11 +42,19 @@ LOGGER = getLogger(__name__)
 cpu_no = cpu_count()
 
 DOWNLOAD_DIR = "/usr/src/app/downloads/"
-intervals = {"status": {}, "qb": "", "jd": "", "nzb": "", "stopAll": False}
+intervals = {
+    "status": {},
+    "snapshot": "",
+    "aria2": "",
+    "qb": "",
+    "jd": "",
+    "nzb": "",
+    "stopAll": False,
+}
 qb_torrents = {}
 jd_downloads = {}
 nzb_jobs = {}
-user_data = {}
+user_data = OrderedDict()
 aria2_options = {}
 qbit_options = {}
 nzb_options = {}
@@ -70,7 +79,7 @@ queue_dict_lock = Lock()
 qb_listener_lock = Lock()
 nzb_listener_lock = Lock()
 jd_listener_lock = Lock()
-cpu_eater_lock = Lock()
+cpu_eater_lock = Semaphore(max(1, cpu_no // 2))
 same_directory_lock = Lock()
 
 sabnzbd_client = SabnzbdClient(
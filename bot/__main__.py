@@ -6,7 +6,6 @@ Config.load()
 
 
 async def main():
-    from asyncio import gather
     from .core.startup import (
         load_settings,
         load_configurations,
@@ -15,21 +14,9 @@ async def main():
         update_nzb_options,
         update_qb_options,
         update_variables,
+        run_startup_steps,
     )
-
-    await load_settings()
-
-    await gather(TgClient.start_bot(), TgClient.start_user())
-    await gather(load_configurations(), update_variables())
-
     from .core.torrent_manager import TorrentManager
-
-    await TorrentManager.initiate()
-    await gather(
-        update_qb_options(),
-        update_aria2_options(),
-        update_nzb_options(),
-    )
     from .helper.ext_utils.files_utils import clean_all
     from .core.jdownloader_booter import jdownloader
     from .helper.ext_utils.telegraph_helper import telegraph
@@ -40,15 +27,30 @@ async def main():
         restart_notification,
     )
 
-    await gather(
-        save_settings(),
-        jdownloader.boot(),
-        clean_all(),
-        initiate_search_tools(),
-        get_packages_version(),
-        restart_notification(),
-        telegraph.create_account(),
-        rclone_serve_booter(),
+    await run_startup_steps(
+        {
+            "settings": (load_settings, [], True),
+            "bot": (TgClient.start_bot, ["settings"], True),
+            "user": (TgClient.start_user, ["settings"], True),
+            "configs": (load_configurations, ["settings"], True),
+            "variables": (update_variables, ["bot", "user"], True),
+            "torrents": (TorrentManager.initiate, ["configs"], True),
+            "qbit_options": (update_qb_options, ["torrents"], True),
+            "aria2_options": (update_aria2_options, ["torrents"], True),
+            "nzb_options": (update_nzb_options, ["torrents"], True),
+            "save_settings": (
+                save_settings,
+                ["variables", "qbit_options", "aria2_options", "nzb_options"],
+                True,
+            ),
+            "clean": (clean_all, ["torrents"], True),
+            "restart_notification": (restart_notification, ["bot"], True),
+            "jdownloader": (jdownloader.boot, ["bot", "configs"], False),
+            "search": (initiate_search_tools, ["torrents"], False),
+            "telegraph": (telegraph.create_account, [], False),
+            "rclone_serve": (rclone_serve_booter, ["configs"], False),
+            "versions": (get_packages_version, [], False),
+        }
     )
 
 
@@ -8,27 +8,36 @@ from bot import LOGGER
 
 
 class Config:
+    ARCHIVE_LEVEL = 0
+    ARCHIVE_THREADS = 0
     AS_DOCUMENT = False
     AUTHORIZED_CHATS = ""
     BASE_URL = ""
     BASE_URL_PORT = 80
     BOT_TOKEN = ""
     CMD_SUFFIX = ""
+    CONCURRENT_EXTRACTIONS = 1
     DATABASE_URL = ""
     DEFAULT_UPLOAD = "rc"
+    DIRECT_CONCURRENT_DOWNLOADS = 1
     EQUAL_SPLITS = False
     EXCLUDED_EXTENSIONS = ""
     FFMPEG_CMDS = {}
     FILELION_API = ""
+    GDRIVE_CONCURRENT_CLONES = 1
+    GDRIVE_CONCURRENT_UPLOADS = 1
     GDRIVE_ID = ""
     INCOMPLETE_TASK_NOTIFIER = False
     INDEX_URL = ""
     IS_TEAM_DRIVE = False
     JD_EMAIL = ""
     JD_PASS = ""
+    LEECH_CONCURRENT_UPLOADS = 1
+    LEECH_VIRTUAL_SPLIT = False
     LEECH_DUMP_CHAT = ""
     LEECH_FILENAME_PREFIX = ""
     LEECH_SPLIT_SIZE = 2097152000
+    LEECH_STREAMING = False
     MEDIA_GROUP = False
     HYBRID_LEECH = False
     HYDRA_IP = ""
@@ -38,6 +47,8 @@ class Config:
     QUEUE_ALL = 0
     QUEUE_DOWNLOAD = 0
     QUEUE_UPLOAD = 0
+    QUEUE_USER_LIMIT = 0
+    QUEUE_SMALL_FIRST = False
     RCLONE_FLAGS = ""
     RCLONE_PATH = ""
     RCLONE_SERVE_URL = ""
@@ -53,6 +64,7 @@ class Config:
     STATUS_LIMIT = 4
     STATUS_UPDATE_INTERVAL = 15
     STOP_DUPLICATE = False
+    STORAGE_THRESHOLD = 0
     STREAMWISH_API = ""
     SUDO_USERS = ""
     TELEGRAM_API = 0
@@ -64,6 +76,7 @@ class Config:
     UPSTREAM_REPO = ""
     UPSTREAM_BRANCH = "master"
     USENET_SERVERS = []
+    USER_CACHE_SIZE = 1000
     USER_SESSION_STRING = ""
     USER_TRANSMISSION = False
     USE_SERVICE_ACCOUNTS = False
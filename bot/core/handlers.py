@@ -8,6 +8,9 @@ from .mltb_client import TgClient
 
 
 def add_handlers():
+    TgClient.bot.add_handler(MessageHandler(load_user_data), group=-2)
+    TgClient.bot.add_handler(EditedMessageHandler(load_user_data), group=-2)
+    TgClient.bot.add_handler(CallbackQueryHandler(load_user_data), group=-2)
     TgClient.bot.add_handler(
         MessageHandler(
             authorize,
@@ -1,7 +1,8 @@
-from aiofiles.os import path as aiopath, remove, makedirs
+from aiofiles.os import path as aiopath, remove
 from aiofiles import open as aiopen
 from aioshutil import rmtree
-from asyncio import create_subprocess_exec, create_subprocess_shell
+from asyncio import create_subprocess_exec, create_subprocess_shell, gather, Task
+from time import time
 
 from .. import (
     aria2_options,
@@ -10,19 +11,22 @@ from .. import (
     drives_ids,
     drives_names,
     index_urls,
-    user_data,
     excluded_extensions,
     LOGGER,
     rss_dict,
     sabnzbd_client,
     auth_chats,
     sudo_users,
+    bot_loop,
 )
 from ..helper.ext_utils.db_handler import database
 from .config_manager import Config
 from .mltb_client import TgClient
 from .torrent_manager import TorrentManager
 
+startup_times = {}
+startup_tasks = {}
+
 
 async def update_qb_options():
     if not qbit_options:
@@ -97,32 +101,6 @@ async def load_settings():
             async with aiopen(f"sabnzbd/{file_}", "wb+") as f:
                 await f.write(value)
 
-        if await database.db.users.find_one():
-            for p in ["thumbnails", "tokens", "rclone"]:
-                if not await aiopath.exists(p):
-                    await makedirs(p)
-            rows = database.db.users.find({})
-            async for row in rows:
-                uid = row["_id"]
-                del row["_id"]
-                thumb_path = f"thumbnails/{uid}.jpg"
-                rclone_config_path = f"rclone/{uid}.conf"
-                token_path = f"tokens/{uid}.pickle"
-                if row.get("THUMBNAIL"):
-                    async with aiopen(thumb_path, "wb+") as f:
-                        await f.write(row["THUMBNAIL"])
-                    row["THUMBNAIL"] = thumb_path
-                if row.get("RCLONE_CONFIG"):
-                    async with aiopen(rclone_config_path, "wb+") as f:
-                        await f.write(row["RCLONE_CONFIG"])
-                    row["RCLONE_CONFIG"] = rclone_config_path
-                if row.get("TOKEN_PICKLE"):
-                    async with aiopen(token_path, "wb+") as f:
-                        await f.write(row["TOKEN_PICKLE"])
-                    row["TOKEN_PICKLE"] = token_path
-                user_data[uid] = row
-            LOGGER.info("Users data has been imported from Database")
-
         if await database.db.rss[BOT_ID].find_one():
             rows = database.db.rss[BOT_ID].find({})
             async for row in rows:
@@ -243,3 +221,26 @@ async def load_configurations():
 
     if not await aiopath.exists("accounts"):
         Config.USE_SERVICE_ACCOUNTS = False
+
+
+async def run_startup_steps(steps):
+    async def run(name, func, deps, critical):
+        await gather(*(startup_tasks[dep] for dep in deps))
+        start = time()
+        detached = False
+        try:
+            detached = isinstance(await func(), Task)
+        except Exception as e:
+            LOGGER.error(f"Startup step {name} failed: {e}")
+            if critical:
+                raise
+        finally:
+            startup_times[name] = time() - start
+            LOGGER.info(
+                f"Startup step {name} took {startup_times[name]:.2f}s"
+                + (" (launched in background, runtime not measured)" if detached else "")
+            )
+
+    for name, (func, deps, critical) in steps.items():
+        startup_tasks[name] = bot_loop.create_task(run(name, func, deps, critical))
+    await gather(*(startup_tasks[name] for name, step in steps.items() if step[2]))
@@ -2,6 +2,7 @@ from aioaria2 import Aria2WebsocketClient
 from aioqbt.client import create_client
 from asyncio import gather, TimeoutError
 from aiohttp import ClientError
+from datetime import datetime, timedelta
 from pathlib import Path
 from inspect import iscoroutinefunction
 from tenacity import (
@@ -33,9 +34,58 @@ def wrap_with_retry(obj, max_retries=3):
     return obj
 
 
+class QbTorrent:
+    def __init__(self, hash_, data):
+        self.hash = hash_
+        self._data = data
+
+    def __getattr__(self, key):
+        try:
+            return self._data[key]
+        except KeyError as e:
+            raise AttributeError(key) from e
+
+    @property
+    def tags(self):
+        return [t.strip() for t in self._data.get("tags", "").split(",") if t.strip()]
+
+    @property
+    def eta(self):
+        return timedelta(seconds=self._data.get("eta", 0))
+
+    @property
+    def seeding_time(self):
+        return timedelta(seconds=self._data.get("seeding_time", 0))
+
+    @property
+    def completion_on(self):
+        return datetime.fromtimestamp(self._data.get("completion_on", -1))
+
+
+ARIA2_STOPPED_KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "uploadLength",
+    "downloadSpeed",
+    "uploadSpeed",
+    "connections",
+    "numSeeders",
+    "seeder",
+    "followedBy",
+    "dir",
+    "errorMessage",
+]
+ARIA2_KEYS = [*ARIA2_STOPPED_KEYS, "files", "bittorrent"]
+
+
 class TorrentManager:
     aria2 = None
     qbittorrent = None
+    aria2_state = {}
+    qb_state = {}
+    _qb_rid = 0
 
     @classmethod
     async def initiate(cls):
@@ -45,6 +95,50 @@ class TorrentManager:
         )
         cls.qbittorrent = wrap_with_retry(cls.qbittorrent)
 
+    @classmethod
+    async def sync_aria2(cls):
+        active, waiting, stopped = await gather(
+            cls.aria2.tellActive(ARIA2_KEYS),
+            cls.aria2.tellWaiting(0, 1000, ARIA2_KEYS),
+            cls.aria2.tellStopped(0, 1000, ARIA2_STOPPED_KEYS),
+        )
+        for download in stopped:
+            if old := cls.aria2_state.get(download["gid"]):
+                for key in ("files", "bittorrent"):
+                    if key in old:
+                        download[key] = old[key]
+        cls.aria2_state = {
+            download["gid"]: download for download in [*stopped, *waiting, *active]
+        }
+        return len(active) + len(waiting)
+
+    @classmethod
+    async def aria2_status(cls, gid):
+        download = await cls.aria2.tellStatus(gid)
+        if download:
+            cls.aria2_state[gid] = download
+        return download
+
+    @classmethod
+    async def sync_qbittorrent(cls):
+        maindata = await cls.qbittorrent.sync.maindata(cls._qb_rid)
+        if maindata.full_update:
+            cls.qb_state.clear()
+        for hash_ in maindata.torrents_removed or []:
+            cls.qb_state.pop(hash_, None)
+        for hash_, data in (maindata.torrents or {}).items():
+            if hash_ in cls.qb_state:
+                cls.qb_state[hash_]._data.update(data)
+            else:
+                cls.qb_state[hash_] = QbTorrent(hash_, dict(data))
+        cls._qb_rid = maindata.rid
+        return cls.qb_state
+
+    @classmethod
+    def reset_qbittorrent_state(cls):
+        cls.qb_state.clear()
+        cls._qb_rid = 0
+
     @classmethod
     async def close_all(cls):
         await gather(cls.aria2.close(), cls.qbittorrent.close())
@@ -1,6 +1,6 @@
 from aiofiles.os import path as aiopath, remove, makedirs, listdir
-from asyncio import sleep, gather
-from os import walk, path as ospath
+from asyncio import sleep, gather, Semaphore
+from os import path as ospath
 from secrets import token_urlsafe
 from aioshutil import move, rmtree
 from pyrogram.enums import ChatAction
@@ -16,14 +16,14 @@ from .. import (
     task_dict_lock,
     task_dict,
     excluded_extensions,
-    cpu_eater_lock,
     intervals,
     DOWNLOAD_DIR,
 )
 from ..core.config_manager import Config
 from ..core.mltb_client import TgClient
-from .ext_utils.bot_utils import new_task, sync_to_async, get_size_bytes
+from .ext_utils.bot_utils import new_task, get_size_bytes
 from .ext_utils.bulk_links import extract_bulk_links
+from .ext_utils.db_handler import database
 from .mirror_leech_utils.gdrive_utils.list import GoogleDriveList
 from .mirror_leech_utils.rclone_utils.list import RcloneList
 from .mirror_leech_utils.status_utils.sevenz_status import SevenZStatus
@@ -35,6 +35,7 @@ from .ext_utils.files_utils import (
     is_archive,
     is_archive_split,
     get_path_size,
+    get_manifest,
     split_file,
     SevenZ,
 )
@@ -119,6 +120,7 @@ class TaskConfig:
         self.subproc = None
         self.thumb = None
         self.excluded_extensions = []
+        self.virtual_splits = {}
         self.files_to_proceed = []
         self.is_super_chat = self.message.chat.type.name in ["SUPERGROUP", "CHANNEL"]
         self.vid_mode = False
@@ -474,6 +476,7 @@ class TaskConfig:
                 self.tag, id_ = text[1].split("Tag: ")[1].split()
             self.user = self.message.from_user = await self.client.get_users(id_)
             self.user_id = self.user.id
+            await database.load_user(self.user_id)
             self.user_dict = user_data.get(self.user_id, {})
             try:
                 await self.message.unpin()
@@ -597,7 +600,7 @@ class TaskConfig:
         if self.is_file and is_archive(dl_path):
             self.files_to_proceed.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, _, files in (await get_manifest(dl_path)).walk(topdown=False):
                 for file_ in files:
                     if (
                         is_first_archive_split(file_)
@@ -614,28 +617,43 @@ class TaskConfig:
         LOGGER.info(f"Extracting: {self.name}")
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Extract")
-        for dirpath, _, files in await sync_to_async(
-            walk, self.up_dir or self.dir, topdown=False
-        ):
-            code = 0
-            for file_ in files:
+        slots = Semaphore(max(1, Config.CONCURRENT_EXTRACTIONS))
+
+        async def _extract(f_path, t_path):
+            async with slots:
                 if self.is_cancelled:
                     return False
-                if (
-                    is_first_archive_split(file_)
-                    or is_archive(file_)
-                    and not file_.strip().lower().endswith(".rar")
-                ):
+                self.proceed_count += 1
+                if not self.is_file:
+                    self.subname = ospath.basename(f_path)
+                return await sevenz.extract(f_path, t_path, pswd)
 
-                    self.proceed_count += 1
-                    f_path = ospath.join(dirpath, file_)
-                    t_path = get_base_name(f_path) if self.is_file else dirpath
-                    if not self.is_file:
-                        self.subname = file_
-                    code = await sevenz.extract(f_path, t_path, pswd)
-            if self.is_cancelled:
-                return code
-            if code == 0:
+        dirs = []
+        jobs = []
+        for dirpath, _, files in (
+            await get_manifest(self.up_dir or self.dir)
+        ).walk(topdown=False):
+            archives = [
+                file_
+                for file_ in files
+                if is_first_archive_split(file_)
+                or is_archive(file_)
+                and not file_.strip().lower().endswith(".rar")
+            ]
+            dirs.append((dirpath, files, len(archives)))
+            for file_ in archives:
+                f_path = ospath.join(dirpath, file_)
+                t_path = get_base_name(f_path) if self.is_file else dirpath
+                jobs.append(_extract(f_path, t_path))
+        codes = await gather(*jobs)
+        if self.is_cancelled:
+            return False
+        code = codes[-1] if codes else 0
+        index = 0
+        for dirpath, files, count in dirs:
+            dir_codes = codes[index : index + count]
+            index += count
+            if all(c == 0 for c in dir_codes):
                 for file_ in files:
                     if is_archive_split(file_) or is_archive(file_):
                         del_path = ospath.join(dirpath, file_)
@@ -654,148 +672,138 @@ class TaskConfig:
             [part.strip() for part in split(item) if part.strip()]
             for item in self.ffmpeg_cmds
         ]
-        try:
-            ffmpeg = FFMpeg(self)
-            for ffmpeg_cmd in cmds:
-                self.proceed_count = 0
-                cmd = [
-                    "ffmpeg",
-                    "-hide_banner",
-                    "-loglevel",
-                    "error",
-                    "-progress",
-                    "pipe:1",
-                ] + ffmpeg_cmd
-                if "-del" in cmd:
-                    cmd.remove("-del")
-                    delete_files = True
-                else:
-                    delete_files = False
-                input_indexes = [
-                    index for index, value in enumerate(cmd) if value == "-i"
-                ]
+        ffmpeg = FFMpeg(self)
+        for ffmpeg_cmd in cmds:
+            self.proceed_count = 0
+            cmd = [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-progress",
+                "pipe:1",
+            ] + ffmpeg_cmd
+            if "-del" in cmd:
+                cmd.remove("-del")
+                delete_files = True
+            else:
+                delete_files = False
+            input_indexes = [
+                index for index, value in enumerate(cmd) if value == "-i"
+            ]
+            for index in input_indexes:
+                if cmd[index + 1].startswith("mltb"):
+                    input_file = cmd[index + 1]
+                    break
+            if input_file.strip().endswith(".video"):
+                ext = "video"
+            elif input_file.strip().endswith(".audio"):
+                ext = "audio"
+            elif "." not in input_file:
+                ext = "all"
+            else:
+                ext = ospath.splitext(input_file)[-1].lower()
+            if await aiopath.isfile(dl_path):
+                is_video, is_audio, _ = await get_document_type(dl_path)
+                if not is_video and not is_audio:
+                    break
+                elif is_video and ext == "audio":
+                    break
+                elif is_audio and not is_video and ext == "video":
+                    break
+                elif ext not in [
+                    "all",
+                    "audio",
+                    "video",
+                ] and not dl_path.strip().lower().endswith(ext):
+                    break
+                new_folder = ospath.splitext(dl_path)[0]
+                name = ospath.basename(dl_path)
+                await makedirs(new_folder, exist_ok=True)
+                file_path = f"{new_folder}/{name}"
+                await move(dl_path, file_path)
+                if not checked:
+                    checked = True
+                    async with task_dict_lock:
+                        task_dict[self.mid] = FFmpegStatus(
+                            self, ffmpeg, gid, "FFmpeg"
+                        )
+                LOGGER.info(f"Running ffmpeg cmd for: {file_path}")
                 for index in input_indexes:
                     if cmd[index + 1].startswith("mltb"):
-                        input_file = cmd[index + 1]
-                        break
-                if input_file.strip().endswith(".video"):
-                    ext = "video"
-                elif input_file.strip().endswith(".audio"):
-                    ext = "audio"
-                elif "." not in input_file:
-                    ext = "all"
-                else:
-                    ext = ospath.splitext(input_file)[-1].lower()
-                if await aiopath.isfile(dl_path):
-                    is_video, is_audio, _ = await get_document_type(dl_path)
-                    if not is_video and not is_audio:
-                        break
-                    elif is_video and ext == "audio":
-                        break
-                    elif is_audio and not is_video and ext == "video":
-                        break
-                    elif ext not in [
-                        "all",
-                        "audio",
-                        "video",
-                    ] and not dl_path.strip().lower().endswith(ext):
-                        break
-                    new_folder = ospath.splitext(dl_path)[0]
-                    name = ospath.basename(dl_path)
-                    await makedirs(new_folder, exist_ok=True)
-                    file_path = f"{new_folder}/{name}"
-                    await move(dl_path, file_path)
-                    if not checked:
-                        checked = True
-                        async with task_dict_lock:
-                            task_dict[self.mid] = FFmpegStatus(
-                                self, ffmpeg, gid, "FFmpeg"
-                            )
-                        self.progress = False
-                        await cpu_eater_lock.acquire()
-                        self.progress = True
-                    LOGGER.info(f"Running ffmpeg cmd for: {file_path}")
-                    for index in input_indexes:
-                        if cmd[index + 1].startswith("mltb"):
-                            cmd[index + 1] = file_path
-                        elif is_telegram_link(cmd[index + 1]):
-                            msg = (await get_tg_link_message(cmd[index + 1]))[0]
-                            file_dir = await temp_download(msg)
-                            inputs[index + 1] = file_dir
-                            cmd[index + 1] = file_dir
-                    self.subsize = self.size
-                    res = await ffmpeg.ffmpeg_cmds(cmd, file_path)
-                    if res:
-                        if delete_files:
-                            await remove(file_path)
-                            if len(await listdir(new_folder)) == 1:
-                                folder = new_folder.rsplit("/", 1)[0]
-                                self.name = ospath.basename(res[0])
-                                if self.name.startswith("ffmpeg"):
-                                    self.name = self.name.split(".", 1)[-1]
-                                dl_path = ospath.join(folder, self.name)
-                                await move(res[0], dl_path)
-                                await rmtree(new_folder)
-                            else:
-                                dl_path = new_folder
-                                self.name = new_folder.rsplit("/", 1)[-1]
+                        cmd[index + 1] = file_path
+                    elif is_telegram_link(cmd[index + 1]):
+                        msg = (await get_tg_link_message(cmd[index + 1]))[0]
+                        file_dir = await temp_download(msg)
+                        inputs[index + 1] = file_dir
+                        cmd[index + 1] = file_dir
+                self.subsize = self.size
+                res = await ffmpeg.ffmpeg_cmds(cmd, file_path)
+                if res:
+                    if delete_files:
+                        await remove(file_path)
+                        if len(await listdir(new_folder)) == 1:
+                            folder = new_folder.rsplit("/", 1)[0]
+                            self.name = ospath.basename(res[0])
+                            if self.name.startswith("ffmpeg"):
+                                self.name = self.name.split(".", 1)[-1]
+                            dl_path = ospath.join(folder, self.name)
+                            await move(res[0], dl_path)
+                            await rmtree(new_folder)
                         else:
                             dl_path = new_folder
                             self.name = new_folder.rsplit("/", 1)[-1]
                     else:
-                        await move(file_path, dl_path)
-                        await rmtree(new_folder)
+                        dl_path = new_folder
+                        self.name = new_folder.rsplit("/", 1)[-1]
                 else:
-                    for dirpath, _, files in await sync_to_async(
-                        walk, dl_path, topdown=False
-                    ):
-                        for file_ in files:
-                            var_cmd = cmd.copy()
-                            if self.is_cancelled:
-                                return False
-                            f_path = ospath.join(dirpath, file_)
-                            is_video, is_audio, _ = await get_document_type(f_path)
-                            if not is_video and not is_audio:
-                                continue
-                            elif is_video and ext == "audio":
-                                continue
-                            elif is_audio and not is_video and ext == "video":
-                                continue
-                            elif ext not in [
-                                "all",
-                                "audio",
-                                "video",
-                            ] and not f_path.strip().lower().endswith(ext):
-                                continue
-                            self.proceed_count += 1
-                            var_cmd[index + 1] = f_path
-                            if not checked:
-                                checked = True
-                                async with task_dict_lock:
-                                    task_dict[self.mid] = FFmpegStatus(
-                                        self, ffmpeg, gid, "FFmpeg"
-                                    )
-                                self.progress = False
-                                await cpu_eater_lock.acquire()
-                                self.progress = True
-                            LOGGER.info(f"Running ffmpeg cmd for: {f_path}")
-                            self.subsize = await get_path_size(f_path)
-                            self.subname = file_
-                            res = await ffmpeg.ffmpeg_cmds(var_cmd, f_path)
-                            if res and delete_files:
-                                await remove(f_path)
-                                if len(res) == 1:
-                                    file_name = ospath.basename(res[0])
-                                    if file_name.startswith("ffmpeg"):
-                                        newname = file_name.split(".", 1)[-1]
-                                        newres = ospath.join(dirpath, newname)
-                                        await move(res[0], newres)
-                for inp in inputs.values():
-                    if "/temp/" in inp and aiopath.exists(inp):
-                        await remove(inp)
-        finally:
-            if checked:
-                cpu_eater_lock.release()
+                    await move(file_path, dl_path)
+                    await rmtree(new_folder)
+            else:
+                for dirpath, _, files in (await get_manifest(dl_path)).walk(
+                    topdown=False
+                ):
+                    for file_ in files:
+                        var_cmd = cmd.copy()
+                        if self.is_cancelled:
+                            return False
+                        f_path = ospath.join(dirpath, file_)
+                        is_video, is_audio, _ = await get_document_type(f_path)
+                        if not is_video and not is_audio:
+                            continue
+                        elif is_video and ext == "audio":
+                            continue
+                        elif is_audio and not is_video and ext == "video":
+                            continue
+                        elif ext not in [
+                            "all",
+                            "audio",
+                            "video",
+                        ] and not f_path.strip().lower().endswith(ext):
+                            continue
+                        self.proceed_count += 1
+                        var_cmd[index + 1] = f_path
+                        if not checked:
+                            checked = True
+                            async with task_dict_lock:
+                                task_dict[self.mid] = FFmpegStatus(
+                                    self, ffmpeg, gid, "FFmpeg"
+                                )
+                        LOGGER.info(f"Running ffmpeg cmd for: {f_path}")
+                        self.subsize = await get_path_size(f_path)
+                        self.subname = file_
+                        res = await ffmpeg.ffmpeg_cmds(var_cmd, f_path)
+                        if res and delete_files:
+                            await remove(f_path)
+                            if len(res) == 1:
+                                file_name = ospath.basename(res[0])
+                                if file_name.startswith("ffmpeg"):
+                                    newname = file_name.split(".", 1)[-1]
+                                    newres = ospath.join(dirpath, newname)
+                                    await move(res[0], newres)
+            for inp in inputs.values():
+                if "/temp/" in inp and aiopath.exists(inp):
+                    await remove(inp)
         return dl_path
 
     async def substitute(self, dl_path):
@@ -834,7 +842,7 @@ class TaskConfig:
             await move(dl_path, new_path)
             return new_path
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, _, files in (await get_manifest(dl_path)).walk(topdown=False):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     new_name = perform_substitution(file_, self.name_sub)
@@ -860,7 +868,7 @@ class TaskConfig:
                     return new_folder
         else:
             LOGGER.info(f"Creating Screenshot for: {dl_path}")
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, _, files in (await get_manifest(dl_path)).walk(topdown=False):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     if (await get_document_type(f_path))[0]:
@@ -909,7 +917,7 @@ class TaskConfig:
         if self.is_file:
             all_files.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, _, files in (await get_manifest(dl_path)).walk(topdown=False):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     all_files.append(f_path)
@@ -949,29 +957,26 @@ class TaskConfig:
             ffmpeg = FFMpeg(self)
             async with task_dict_lock:
                 task_dict[self.mid] = FFmpegStatus(self, ffmpeg, gid, "Convert")
-            self.progress = False
-            async with cpu_eater_lock:
-                self.progress = True
-                for f_path, f_type in self.files_to_proceed.items():
-                    self.proceed_count += 1
-                    LOGGER.info(f"Converting: {f_path}")
+            for f_path, f_type in self.files_to_proceed.items():
+                self.proceed_count += 1
+                LOGGER.info(f"Converting: {f_path}")
+                if self.is_file:
+                    self.subsize = self.size
+                else:
+                    self.subsize = await get_path_size(f_path)
+                    self.subname = ospath.basename(f_path)
+                if f_type == "video":
+                    res = await ffmpeg.convert_video(f_path, vext)
+                else:
+                    res = await ffmpeg.convert_audio(f_path, aext)
+                if res:
+                    try:
+                        await remove(f_path)
+                    except:
+                        self.is_cancelled = True
+                        return False
                     if self.is_file:
-                        self.subsize = self.size
-                    else:
-                        self.subsize = await get_path_size(f_path)
-                        self.subname = ospath.basename(f_path)
-                    if f_type == "video":
-                        res = await ffmpeg.convert_video(f_path, vext)
-                    else:
-                        res = await ffmpeg.convert_audio(f_path, aext)
-                    if res:
-                        try:
-                            await remove(f_path)
-                        except:
-                            self.is_cancelled = True
-                            return False
-                        if self.is_file:
-                            return res
+                        return res
         return dl_path
 
     async def generate_sample_video(self, dl_path, gid):
@@ -990,7 +995,7 @@ class TaskConfig:
             file_ = ospath.basename(dl_path)
             self.files_to_proceed[dl_path] = file_
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            for dirpath, _, files in (await get_manifest(dl_path)).walk(topdown=False):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
                     if (await get_document_type(f_path))[0]:
@@ -999,28 +1004,25 @@ class TaskConfig:
             ffmpeg = FFMpeg(self)
             async with task_dict_lock:
                 task_dict[self.mid] = FFmpegStatus(self, ffmpeg, gid, "Sample Video")
-            self.progress = False
-            async with cpu_eater_lock:
-                self.progress = True
-                LOGGER.info(f"Creating Sample video: {self.name}")
-                for f_path, file_ in self.files_to_proceed.items():
-                    self.proceed_count += 1
-                    if self.is_file:
-                        self.subsize = self.size
-                    else:
-                        self.subsize = await get_path_size(f_path)
-                        self.subname = file_
-                    res = await ffmpeg.sample_video(
-                        f_path, sample_duration, part_duration
+            LOGGER.info(f"Creating Sample video: {self.name}")
+            for f_path, file_ in self.files_to_proceed.items():
+                self.proceed_count += 1
+                if self.is_file:
+                    self.subsize = self.size
+                else:
+                    self.subsize = await get_path_size(f_path)
+                    self.subname = file_
+                res = await ffmpeg.sample_video(
+                    f_path, sample_duration, part_duration
+                )
+                if res and self.is_file:
+                    new_folder = ospath.splitext(f_path)[0]
+                    await makedirs(new_folder, exist_ok=True)
+                    await gather(
+                        move(f_path, f"{new_folder}/{file_}"),
+                        move(res, f"{new_folder}/SAMPLE.{file_}"),
                     )
-                    if res and self.is_file:
-                        new_folder = ospath.splitext(f_path)[0]
-                        await makedirs(new_folder, exist_ok=True)
-                        await gather(
-                            move(f_path, f"{new_folder}/{file_}"),
-                            move(res, f"{new_folder}/SAMPLE.{file_}"),
-                        )
-                        return new_folder
+                    return new_folder
         return dl_path
 
     async def proceed_compress(self, dl_path, gid):
@@ -1041,18 +1043,22 @@ class TaskConfig:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Zip")
         return await sevenz.zip(dl_path, up_path, pswd)
 
+    def is_streamed(self, f_path):
+        return False
+
     async def proceed_split(self, dl_path, gid):
         self.files_to_proceed = {}
         if self.is_file:
             f_size = await get_path_size(dl_path)
-            if f_size > self.split_size:
+            if f_size > self.split_size and not self.is_streamed(dl_path):
                 self.files_to_proceed[dl_path] = [f_size, ospath.basename(dl_path)]
         else:
-            for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+            manifest = await get_manifest(dl_path)
+            for dirpath, _, files in manifest.walk(topdown=False):
                 for file_ in files:
                     f_path = ospath.join(dirpath, file_)
-                    f_size = await get_path_size(f_path)
-                    if f_size > self.split_size:
+                    f_size = manifest.get_size(f_path)
+                    if f_size > self.split_size and not self.is_streamed(f_path):
                         self.files_to_proceed[f_path] = [f_size, file_]
         if self.files_to_proceed:
             ffmpeg = FFMpeg(self)
@@ -1066,21 +1072,30 @@ class TaskConfig:
                 else:
                     self.subsize = f_size
                     self.subname = file_
-                parts = -(-f_size // self.split_size)
-                if self.equal_splits:
-                    split_size = (f_size // parts) + (f_size % parts)
-                else:
-                    split_size = self.split_size
-                if not self.as_doc and (await get_document_type(f_path))[0]:
-                    self.progress = True
-                    res = await ffmpeg.split(f_path, file_, parts, split_size)
-                else:
-                    self.progress = False
-                    res = await split_file(f_path, split_size, self)
-                if self.is_cancelled:
+                if not await self.split_one(ffmpeg, f_path, f_size, file_):
                     return False
-                if res or f_size >= self.max_split_size:
-                    try:
-                        await remove(f_path)
-                    except:
-                        self.is_cancelled = True
+
+    async def split_one(self, ffmpeg, f_path, f_size, file_):
+        parts = -(-f_size // self.split_size)
+        if self.equal_splits:
+            split_size = (f_size // parts) + (f_size % parts)
+        else:
+            split_size = self.split_size
+        if not self.as_doc and (await get_document_type(f_path))[0]:
+            self.progress = True
+            res = await ffmpeg.split(f_path, file_, parts, split_size)
+        elif Config.LEECH_VIRTUAL_SPLIT:
+            self.virtual_splits[f_path] = split_size
+            return True
+        else:
+            self.progress = False
+            res = await split_file(f_path, split_size, self)
+        if self.is_cancelled:
+            return False
+        if res or f_size >= self.max_split_size:
+            try:
+                await remove(f_path)
+            except:
+                self.is_cancelled = True
+                return False
+        return True
@@ -1,7 +1,8 @@
 from httpx import AsyncClient
 from asyncio.subprocess import PIPE
 from functools import partial, wraps
-from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from asyncio import (
     create_subprocess_exec,
     create_subprocess_shell,
@@ -9,7 +10,7 @@ from asyncio import (
     sleep,
 )
 
-from ... import user_data, bot_loop
+from ... import user_data, bot_loop, cpu_no
 from ...core.config_manager import Config
 from ..telegram_helper.button_build import ButtonMaker
 from .telegraph_helper import telegraph
@@ -21,7 +22,49 @@ from .help_messages import (
 
 COMMAND_USAGE = {}
 
-THREAD_POOL = ThreadPoolExecutor(max_workers=500)
+
+class ExecutorPool:
+    def __init__(self, name, executor, workers):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+        self.inflight = 0
+        self.completed = 0
+        self.latency = 0
+
+    @property
+    def queued(self):
+        return max(0, self.inflight - self.workers)
+
+    def _on_done(self, start, _):
+        self.inflight -= 1
+        self.completed += 1
+        self.latency += (monotonic() - start - self.latency) * 0.1
+
+    def submit(self, pfunc):
+        self.inflight += 1
+        future = bot_loop.run_in_executor(self.executor, pfunc)
+        future.add_done_callback(partial(self._on_done, monotonic()))
+        return future
+
+
+def _thread_pool(name, workers):
+    return ExecutorPool(
+        name, ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name), workers
+    )
+
+
+POOLS = {
+    "net": _thread_pool("net", 64),
+    "transfer": _thread_pool("transfer", 32),
+    "fs": _thread_pool("fs", min(32, cpu_no + 4)),
+    "cpu": ExecutorPool(
+        "cpu",
+        ProcessPoolExecutor(max_workers=max(1, cpu_no // 2)),
+        max(1, cpu_no // 2),
+    ),
+}
+bot_loop.set_default_executor(POOLS["fs"].executor)
 
 
 class SetInterval:
@@ -234,9 +277,9 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+async def sync_to_async(func, *args, wait=True, pool="net", **kwargs):
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREAD_POOL, pfunc)
+    future = POOLS[pool].submit(pfunc)
     return await future if wait else future
 
 
@@ -1,30 +1,139 @@
 from aiofiles import open as aiopen
-from aiofiles.os import path as aiopath
+from aiofiles.os import path as aiopath, makedirs
+from asyncio import Lock, sleep
+from collections import OrderedDict
+from copy import deepcopy
 from importlib import import_module
-from pymongo import AsyncMongoClient
+from pymongo import AsyncMongoClient, DeleteOne, ReplaceOne, UpdateOne
 from pymongo.server_api import ServerApi
-from pymongo.errors import PyMongoError
+from pymongo.errors import PyMongoError, ConnectionFailure
+from time import time
 
-from ... import LOGGER, user_data, rss_dict, qbit_options
+from ... import LOGGER, user_data, rss_dict, qbit_options, bot_loop
 from ...core.mltb_client import TgClient
 from ...core.config_manager import Config
 
 
+FLUSH_INTERVAL = 1
+FLUSH_ATTEMPTS = 5
+USER_FILES = (
+    ("THUMBNAIL", "thumbnails", "jpg"),
+    ("RCLONE_CONFIG", "rclone", "conf"),
+    ("TOKEN_PICKLE", "tokens", "pickle"),
+)
+
+
 class DbManager:
     def __init__(self):
         self._return = True
         self._conn = None
+        self._pending = {}
+        self._flush_lock = Lock()
+        self._flusher = None
+        self._flushing = False
+        self._failures = {}
+        self._no_user = OrderedDict()
+        self._cached = set()
+        self.flush_latency = 0
+        self.flushed = 0
         self.db = None
 
+    @property
+    def queue_depth(self):
+        return sum(len(ops) for ops in self._pending.values())
+
+    def _queue(self, name, doc_id, kind, value=None):
+        ops = self._pending.setdefault((name, doc_id), [])
+        if kind in ("replace", "delete"):
+            ops.clear()
+        elif kind == "pipeline":
+            ops[:] = [op for op in ops if op[0] != "pipeline"]
+        elif ops and ops[-1][0] == kind:
+            ops[-1][1].update(value)
+            return
+        ops.append((kind, value))
+
+    @staticmethod
+    def _build_op(doc_id, kind, value):
+        if kind == "replace":
+            return ReplaceOne({"_id": doc_id}, value, upsert=True)
+        elif kind == "delete":
+            return DeleteOne({"_id": doc_id})
+        elif kind == "pipeline":
+            return UpdateOne({"_id": doc_id}, value, upsert=True)
+        return UpdateOne({"_id": doc_id}, {f"${kind}": value}, upsert=True)
+
+    async def _flush_loop(self):
+        while self._flushing:
+            await sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                LOGGER.error(f"Error in DB flush: {e}")
+
+    def _requeue(self, key, ops, error=None):
+        if error is not None:
+            attempts = self._failures.get(key, 0) + 1
+            if attempts >= FLUSH_ATTEMPTS:
+                self._failures.pop(key, None)
+                LOGGER.error(
+                    f"Dropping {len(ops)} ops of {key} after {attempts} failed flushes: {error}"
+                )
+                return
+            self._failures[key] = attempts
+        self._pending[key] = ops + self._pending.get(key, [])
+
+    async def _write(self, name, items):
+        ops = [
+            self._build_op(doc_id, *op) for (_, doc_id), key_ops in items for op in key_ops
+        ]
+        await self.db[name].bulk_write(ops, ordered=True)
+        self.flushed += len(ops)
+        for key, _ in items:
+            self._failures.pop(key, None)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending or self.db is None:
+                return
+            pending, self._pending = self._pending, {}
+            batches = {}
+            for key, ops in pending.items():
+                batches.setdefault(key[0], []).append((key, ops))
+            start = time()
+            for name, items in batches.items():
+                try:
+                    await self._write(name, items)
+                    continue
+                except ConnectionFailure as e:
+                    LOGGER.error(f"Error while flushing to {name}: {e}")
+                    for key, ops in items:
+                        self._requeue(key, ops)
+                    continue
+                except Exception as e:
+                    LOGGER.error(f"Error while flushing to {name}: {e}")
+                for key, ops in items:
+                    try:
+                        await self._write(name, [(key, ops)])
+                    except ConnectionFailure:
+                        self._requeue(key, ops)
+                    except Exception as e:
+                        self._requeue(key, ops, e)
+            self.flush_latency = time() - start
+
     async def connect(self):
         try:
             if self._conn is not None:
+                await self.flush()
                 await self._conn.close()
             self._conn = AsyncMongoClient(
                 Config.DATABASE_URL, server_api=ServerApi("1")
             )
             self.db = self._conn.mltb
             self._return = False
+            if self._flusher is None:
+                self._flushing = True
+                self._flusher = bot_loop.create_task(self._flush_loop())
         except PyMongoError as e:
             LOGGER.error(f"Error in DB connection: {e}")
             self.db = None
@@ -33,6 +142,12 @@ class DbManager:
 
     async def disconnect(self):
         self._return = True
+        if self._flusher is not None:
+            self._flushing = False
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        self._pending.clear()
         if self._conn is not None:
             await self._conn.close()
         self._conn = None
@@ -46,37 +161,27 @@ class DbManager:
             for key, value in vars(settings).items()
             if not key.startswith("__")
         }
-        await self.db.settings.deployConfig.replace_one(
-            {"_id": TgClient.ID}, config_file, upsert=True
-        )
+        self._queue("settings.deployConfig", TgClient.ID, "replace", config_file)
 
     async def update_config(self, dict_):
         if self._return:
             return
-        await self.db.settings.config.update_one(
-            {"_id": TgClient.ID}, {"$set": dict_}, upsert=True
-        )
+        self._queue("settings.config", TgClient.ID, "set", dict(dict_))
 
     async def update_aria2(self, key, value):
         if self._return:
             return
-        await self.db.settings.aria2c.update_one(
-            {"_id": TgClient.ID}, {"$set": {key: value}}, upsert=True
-        )
+        self._queue("settings.aria2c", TgClient.ID, "set", {key: value})
 
     async def update_qbittorrent(self, key, value):
         if self._return:
             return
-        await self.db.settings.qbittorrent.update_one(
-            {"_id": TgClient.ID}, {"$set": {key: value}}, upsert=True
-        )
+        self._queue("settings.qbittorrent", TgClient.ID, "set", {key: value})
 
     async def save_qbit_settings(self):
         if self._return:
             return
-        await self.db.settings.qbittorrent.update_one(
-            {"_id": TgClient.ID}, {"$set": qbit_options}, upsert=True
-        )
+        self._queue("settings.qbittorrent", TgClient.ID, "set", qbit_options.copy())
 
     async def update_private_file(self, path):
         if self._return:
@@ -85,28 +190,70 @@ class DbManager:
         if await aiopath.exists(path):
             async with aiopen(path, "rb+") as pf:
                 pf_bin = await pf.read()
-            await self.db.settings.files.update_one(
-                {"_id": TgClient.ID}, {"$set": {db_path: pf_bin}}, upsert=True
-            )
+            self._queue("settings.files", TgClient.ID, "set", {db_path: pf_bin})
             if path == "config.py":
                 await self.update_deploy_config()
         else:
-            await self.db.settings.files.update_one(
-                {"_id": TgClient.ID}, {"$unset": {db_path: ""}}, upsert=True
-            )
+            self._queue("settings.files", TgClient.ID, "unset", {db_path: ""})
 
     async def update_nzb_config(self):
         if self._return:
             return
         async with aiopen("sabnzbd/SABnzbd.ini", "rb+") as pf:
             nzb_conf = await pf.read()
-        await self.db.settings.nzb.replace_one(
-            {"_id": TgClient.ID}, {"SABnzbd__ini": nzb_conf}, upsert=True
+        self._queue(
+            "settings.nzb", TgClient.ID, "replace", {"SABnzbd__ini": nzb_conf}
         )
 
+    async def load_user(self, *ids):
+        if self._return:
+            return
+        missing = []
+        for id_ in dict.fromkeys(ids):
+            if id_ is None:
+                continue
+            elif id_ in user_data and id_ in self._cached:
+                user_data.move_to_end(id_)
+            elif id_ not in self._no_user:
+                missing.append(id_)
+        if not missing:
+            return
+        if any(("users", id_) in self._pending for id_ in missing):
+            await self.flush()
+        async for row in self.db.users.find({"_id": {"$in": missing}}):
+            uid = row.pop("_id")
+            missing.remove(uid)
+            self._cached.add(uid)
+            for key, folder, ext in USER_FILES:
+                if row.get(key):
+                    await makedirs(folder, exist_ok=True)
+                    path = f"{folder}/{uid}.{ext}"
+                    async with aiopen(path, "wb+") as f:
+                        await f.write(row[key])
+                    row[key] = path
+            if (data := user_data.setdefault(uid, row)) is not row:
+                for key, value in row.items():
+                    data.setdefault(key, value)
+        for id_ in missing:
+            self._no_user[id_] = None
+        if limit := Config.USER_CACHE_SIZE:
+            while len(user_data) > limit:
+                self._cached.discard(user_data.popitem(last=False)[0])
+            while len(self._no_user) > limit:
+                self._no_user.popitem(last=False)
+
+    async def get_all_users(self):
+        await self.flush()
+        rows = self.db.users.find({}, {key: 0 for key, *_ in USER_FILES})
+        return {row.pop("_id"): row async for row in rows}
+
     async def update_user_data(self, user_id):
         if self._return:
             return
+        if user_id not in self._cached and user_id not in self._no_user:
+            await self.load_user(user_id)
+        self._no_user.pop(user_id, None)
+        self._cached.add(user_id)
         data = user_data.get(user_id, {})
         data = data.copy()
         for key in ("THUMBNAIL", "RCLONE_CONFIG", "TOKEN_PICKLE"):
@@ -140,58 +287,52 @@ class DbManager:
                 }
             }
         ]
-        await self.db.users.update_one({"_id": user_id}, pipeline, upsert=True)
+        self._queue("users", user_id, "pipeline", pipeline)
 
     async def update_user_doc(self, user_id, key, path=""):
         if self._return:
             return
+        self._no_user.pop(user_id, None)
         if path:
             async with aiopen(path, "rb+") as doc:
                 doc_bin = await doc.read()
-            await self.db.users.update_one(
-                {"_id": user_id}, {"$set": {key: doc_bin}}, upsert=True
-            )
+            self._queue("users", user_id, "set", {key: doc_bin})
         else:
-            await self.db.users.update_one(
-                {"_id": user_id}, {"$unset": {key: ""}}, upsert=True
-            )
+            self._queue("users", user_id, "unset", {key: ""})
 
     async def rss_update_all(self):
         if self._return:
             return
         for user_id in list(rss_dict.keys()):
-            await self.db.rss[TgClient.ID].replace_one(
-                {"_id": user_id}, rss_dict[user_id], upsert=True
-            )
+            await self.rss_update(user_id)
 
     async def rss_update(self, user_id):
         if self._return:
             return
-        await self.db.rss[TgClient.ID].replace_one(
-            {"_id": user_id}, rss_dict[user_id], upsert=True
+        self._queue(
+            f"rss.{TgClient.ID}", user_id, "replace", deepcopy(rss_dict[user_id])
         )
 
     async def rss_delete(self, user_id):
         if self._return:
             return
-        await self.db.rss[TgClient.ID].delete_one({"_id": user_id})
+        self._queue(f"rss.{TgClient.ID}", user_id, "delete")
 
     async def add_incomplete_task(self, cid, link, tag):
         if self._return:
             return
-        await self.db.tasks[TgClient.ID].insert_one(
-            {"_id": link, "cid": cid, "tag": tag}
-        )
+        self._queue(f"tasks.{TgClient.ID}", link, "replace", {"cid": cid, "tag": tag})
 
     async def rm_complete_task(self, link):
         if self._return:
             return
-        await self.db.tasks[TgClient.ID].delete_one({"_id": link})
+        self._queue(f"tasks.{TgClient.ID}", link, "delete")
 
     async def get_incomplete_tasks(self):
         notifier_dict = {}
         if self._return:
             return notifier_dict
+        await self.flush()
         if await self.db.tasks[TgClient.ID].find_one():
             rows = self.db.tasks[TgClient.ID].find({})
             async for row in rows:
@@ -208,7 +349,10 @@ class DbManager:
     async def trunc_table(self, name):
         if self._return:
             return
-        await self.db[name][TgClient.ID].drop()
+        async with self._flush_lock:
+            for key in [k for k in self._pending if k[0] == f"{name}.{TgClient.ID}"]:
+                del self._pending[key]
+            await self.db[name][TgClient.ID].drop()
 
 
 database = DbManager()
@@ -1,8 +1,21 @@
+from aiofiles import open as aiopen
 from aioshutil import rmtree as aiormtree, move
-from asyncio import create_subprocess_exec, sleep, wait_for
+from asyncio import create_subprocess_exec, sleep, wait_for, ensure_future
 from asyncio.subprocess import PIPE
+from io import RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
 from magic import Magic
-from os import walk, path as ospath, readlink
+from shutil import copyfileobj
+from os import (
+    path as ospath,
+    readlink,
+    open as osopen,
+    close,
+    pread,
+    scandir,
+    stat,
+    lstat,
+    O_RDONLY,
+)
 from re import split as re_split, I, search as re_search, escape
 from aiofiles.os import (
     remove,
@@ -12,11 +25,13 @@ from aiofiles.os import (
     readlink as aioreadlink,
     symlink,
     makedirs as aiomakedirs,
+    rename,
 )
 
-from ... import LOGGER, DOWNLOAD_DIR
+from ... import LOGGER, DOWNLOAD_DIR, cpu_eater_lock
+from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager
-from .bot_utils import sync_to_async, cmd_exec
+from .bot_utils import sync_to_async
 from .exceptions import NotSupportedExtractionArchive
 
 ARCH_EXT = [
@@ -91,6 +106,17 @@ FIRST_SPLIT_REGEX = (
     r"\.part0*1\.rar$|\.7z\.0*1$|\.zip\.0*1$|^(?!.*\.part\d+\.rar$).*\.rar$"
 )
 
+TAR_FLAGS = {
+    ".tar": "",
+    ".tar.gz": "-z",
+    ".tgz": "-z",
+    ".tar.bz2": "-j",
+    ".tbz2": "-j",
+    ".tar.xz": "-J",
+}
+
+_manifests = {}
+
 SPLIT_REGEX = r"\.r\d+$|\.7z\.\d+$|\.z\d+$|\.zip\.\d+$|\.part\d+\.rar$"
 
 
@@ -134,42 +160,116 @@ async def clean_all():
     await aiomakedirs(DOWNLOAD_DIR, exist_ok=True)
 
 
+class Manifest:
+    def __init__(self, root):
+        self.root = root
+        self.tree = []
+        self.files = {}
+        self.dirs = {}
+
+    @property
+    def size(self):
+        return sum(entry[0] for entry in self.files.values())
+
+    def walk(self, topdown=True):
+        return self.tree if topdown else self.tree[::-1]
+
+    def get_size(self, path):
+        return self.files[path][0]
+
+
+def _scan_tree(root):
+    manifest = Manifest(root)
+    stack = [root]
+    while stack:
+        dirpath = stack.pop()
+        dirs = []
+        files = []
+        try:
+            manifest.dirs[dirpath] = stat(dirpath).st_mtime_ns
+            with scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        st = entry.stat(follow_symlinks=False)
+                    files.append(entry.name)
+                    manifest.files[entry.path] = (
+                        st.st_size,
+                        st.st_ino,
+                        st.st_mtime_ns,
+                    )
+        except OSError:
+            continue
+        manifest.tree.append((dirpath, dirs, files))
+    manifest.tree.sort(key=lambda item: item[0].split("/"))
+    return manifest
+
+
+def _file_stat(path):
+    try:
+        st = stat(path)
+    except OSError:
+        st = lstat(path)
+    return st.st_size, st.st_ino, st.st_mtime_ns
+
+
+def _is_fresh(manifest):
+    if not manifest.dirs:
+        return False
+    try:
+        return all(
+            stat(dirpath).st_mtime_ns == mtime
+            for dirpath, mtime in manifest.dirs.items()
+        ) and all(
+            _file_stat(path) == entry for path, entry in manifest.files.items()
+        )
+    except OSError:
+        return False
+
+
+async def get_manifest(opath):
+    manifest = _manifests.get(opath)
+    if manifest is None or not await sync_to_async(
+        _is_fresh, manifest, pool="fs"
+    ):
+        manifest = await sync_to_async(_scan_tree, opath, pool="fs")
+        if len(_manifests) >= 100:
+            del _manifests[next(iter(_manifests))]
+        _manifests[opath] = manifest
+    return manifest
+
+
 async def clean_unwanted(opath):
     LOGGER.info(f"Cleaning unwanted files/folders: {opath}")
-    for dirpath, _, files in await sync_to_async(walk, opath, topdown=False):
+    for dirpath, _, files in (await get_manifest(opath)).walk(topdown=False):
         for filee in files:
             f_path = ospath.join(dirpath, filee)
             if filee.strip().endswith(".parts") and filee.startswith("."):
                 await remove(f_path)
         if dirpath.strip().endswith(".unwanted"):
             await aiormtree(dirpath, ignore_errors=True)
-    for dirpath, _, files in await sync_to_async(walk, opath, topdown=False):
+    for dirpath, _, files in (await get_manifest(opath)).walk(topdown=False):
         if not await listdir(dirpath):
             await rmdir(dirpath)
 
 
 async def get_path_size(opath):
-    total_size = 0
     if await aiopath.isfile(opath):
         if await aiopath.islink(opath):
             opath = await aioreadlink(opath)
         return await aiopath.getsize(opath)
-    for root, _, files in await sync_to_async(walk, opath):
-        for f in files:
-            abs_path = ospath.join(root, f)
-            if await aiopath.islink(abs_path):
-                abs_path = await aioreadlink(abs_path)
-            total_size += await aiopath.getsize(abs_path)
-    return total_size
+    return (await get_manifest(opath)).size
 
 
 async def count_files_and_folders(opath):
-    total_files = 0
-    total_folders = 0
-    for _, dirs, files in await sync_to_async(walk, opath):
-        total_files += len(files)
-        total_folders += len(dirs)
-    return total_folders, total_files
+    manifest = await get_manifest(opath)
+    return max(len(manifest.tree) - 1, 0), len(manifest.files)
 
 
 def get_base_name(orig_path):
@@ -208,7 +308,7 @@ def get_mime_type(file_path):
 
 
 async def remove_excluded_files(fpath, ee):
-    for root, _, files in await sync_to_async(walk, fpath):
+    for root, _, files in (await get_manifest(fpath)).walk():
         for f in files:
             if f.strip().lower().endswith(tuple(ee)):
                 await remove(ospath.join(root, f))
@@ -234,34 +334,151 @@ async def move_and_merge(source, destination, mid):
             await move(src_path, dest_path)
 
 
-async def join_files(opath):
+def _append_part(dest, part):
+    with open(dest, "ab") as df:
+        size = df.tell()
+        try:
+            with open(part, "rb") as sf:
+                copyfileobj(sf, df, 16 * 1024 * 1024)
+        except:
+            df.truncate(size)
+            raise
+
+
+async def _join_parts(fpath, parts):
+    if await aiopath.islink(parts[0]):
+        # seeding: parts are links to the torrent files, which must stay untouched
+        try:
+            for part in parts:
+                await sync_to_async(_append_part, fpath, part, pool="fs")
+        except:
+            if await aiopath.isfile(fpath):
+                await remove(fpath)
+            raise
+        for part in parts:
+            await remove(part)
+        return
+    await rename(parts[0], fpath)
+    try:
+        for part in parts[1:]:
+            await sync_to_async(_append_part, fpath, part, pool="fs")
+            await remove(part)
+    except:
+        await rename(fpath, parts[0])
+        raise
+
+
+async def _stream_extract(opath, parts, flag):
+    cmd = ["tar", "-x", "-f", "-", "-C", opath]
+    if flag:
+        cmd.insert(1, flag)
+    async with cpu_eater_lock:
+        proc = await create_subprocess_exec(*cmd, stdin=PIPE, stderr=PIPE)
+        stderr = ensure_future(proc.stderr.read())
+        try:
+            for part in parts:
+                async with aiopen(part, "rb") as f:
+                    while chunk := await f.read(4 * 1024 * 1024):
+                        proc.stdin.write(chunk)
+                        await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        await proc.wait()
+        stderr = await stderr
+    if proc.returncode != 0:
+        raise Exception(stderr.decode().strip())
+    for part in parts:
+        await remove(part)
+
+
+async def join_files(opath, extract=False):
     files = await listdir(opath)
-    results = []
     exists = False
+    joined = False
     for file_ in files:
         if re_search(r"\.0+2$", file_) and await sync_to_async(
-            get_mime_type, f"{opath}/{file_}"
+            get_mime_type, f"{opath}/{file_}", pool="fs"
         ) not in ["application/x-7z-compressed", "application/zip"]:
             exists = True
             final_name = file_.rsplit(".", 1)[0]
-            fpath = f"{opath}/{final_name}"
-            cmd = f'cat "{fpath}."* > "{fpath}"'
-            _, stderr, code = await cmd_exec(cmd, True)
-            if code != 0:
-                LOGGER.error(f"Failed to join {final_name}, stderr: {stderr}")
-                if await aiopath.isfile(fpath):
-                    await remove(fpath)
-            else:
-                results.append(final_name)
+            parts = sorted(
+                (
+                    f"{opath}/{part}"
+                    for part in files
+                    if re_search(rf"^{escape(final_name)}\.\d+$", part)
+                ),
+                key=lambda part: int(part.rsplit(".", 1)[1]),
+            )
+            flag = next(
+                (
+                    flag
+                    for ext, flag in TAR_FLAGS.items()
+                    if final_name.lower().endswith(ext)
+                ),
+                None,
+            )
+            try:
+                if extract and flag is not None:
+                    try:
+                        await _stream_extract(opath, parts, flag)
+                    except Exception as e:
+                        LOGGER.error(
+                            f"Failed to extract {final_name} while joining, error: {e}"
+                        )
+                        await _join_parts(f"{opath}/{final_name}", parts)
+                else:
+                    await _join_parts(f"{opath}/{final_name}", parts)
+                joined = True
+            except Exception as e:
+                LOGGER.error(f"Failed to join {final_name}, error: {e}")
 
     if not exists:
         LOGGER.warning("No files to join!")
-    elif results:
+    elif joined:
         LOGGER.info("Join Completed!")
-        for res in results:
-            for file_ in files:
-                if re_search(rf"{escape(res)}\.0[0-9]+$", file_):
-                    await remove(f"{opath}/{file_}")
+
+
+class FileRange(RawIOBase):
+    """Read-only view over a byte range of a file."""
+
+    def __init__(self, path, offset, length, name):
+        self._fd = osopen(path, O_RDONLY)
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, pos, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            pos += self._pos
+        elif whence == SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, b):
+        size = min(len(b), self._length - self._pos)
+        if size <= 0:
+            return 0
+        data = pread(self._fd, size, self._offset + self._pos)
+        b[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            close(self._fd)
+        super().close()
 
 
 async def split_file(f_path, split_size, listener):
@@ -296,40 +513,55 @@ async def split_file(f_path, split_size, listener):
 class SevenZ:
     def __init__(self, listener):
         self._listener = listener
-        self._processed_bytes = 0
-        self._percentage = "0%"
+        self._runs = {}
 
     @property
     def processed_bytes(self):
-        return self._processed_bytes
+        return sum(run[1] for run in self._runs.values())
+
+    @property
+    def size(self):
+        return sum(run[0] for run in self._runs.values())
 
     @property
     def progress(self):
-        return self._percentage
+        try:
+            return f"{int(self.processed_bytes / self.size * 100)}%"
+        except:
+            return "0%"
 
-    async def _sevenz_progress(self):
+    def kill(self):
+        for proc in list(self._runs):
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except:
+                    pass
+
+    async def _sevenz_progress(self, proc, run):
         pattern = r"(\d+)\s+bytes|Total Physical Size\s*=\s*(\d+)"
         while not (
-            self._listener.subproc.returncode is not None
+            proc.returncode is not None
             or self._listener.is_cancelled
-            or self._listener.subproc.stdout.at_eof()
+            or proc.stdout.at_eof()
         ):
             try:
-                line = await wait_for(self._listener.subproc.stdout.readline(), 2)
+                line = await wait_for(proc.stdout.readline(), 2)
             except:
                 break
             line = line.decode().strip()
             if match := re_search(pattern, line):
-                self._listener.subsize = int(match[1] or match[2])
+                run[0] = int(match[1] or match[2])
+                self._listener.subsize = self.size
             await sleep(0.05)
         s = b""
         while not (
             self._listener.is_cancelled
-            or self._listener.subproc.returncode is not None
-            or self._listener.subproc.stdout.at_eof()
+            or proc.returncode is not None
+            or proc.stdout.at_eof()
         ):
             try:
-                char = await wait_for(self._listener.subproc.stdout.read(1), 60)
+                char = await wait_for(proc.stdout.read(1), 60)
             except:
                 break
             if not char:
@@ -337,18 +569,30 @@ class SevenZ:
             s += char
             if char == b"%":
                 try:
-                    self._percentage = s.decode().rsplit(" ", 1)[-1].strip()
-                    self._processed_bytes = (
-                        int(self._percentage.strip("%")) / 100
-                    ) * self._listener.subsize
+                    percentage = s.decode().rsplit(" ", 1)[-1].strip()
+                    run[1] = (int(percentage.strip("%")) / 100) * run[0]
                 except:
-                    self._processed_bytes = 0
-                    self._percentage = "0%"
+                    run[1] = 0
                 s = b""
             await sleep(0.05)
 
-        self._processed_bytes = 0
-        self._percentage = "0%"
+    async def _run(self, cmd):
+        if not self._runs:
+            self._listener.progress = False
+        async with cpu_eater_lock:
+            self._listener.progress = True
+            if self._listener.is_cancelled:
+                return None, b""
+            proc = self._listener.subproc = await create_subprocess_exec(
+                *cmd, stdout=PIPE, stderr=PIPE
+            )
+            self._runs[proc] = [0, 0]
+            try:
+                await self._sevenz_progress(proc, self._runs[proc])
+                _, stderr = await proc.communicate()
+            finally:
+                del self._runs[proc]
+            return proc.returncode, stderr
 
     async def extract(self, f_path, t_path, pswd):
         cmd = [
@@ -367,14 +611,7 @@ class SevenZ:
             del cmd[2]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
-        )
-        await self._sevenz_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(cmd)
         if self._listener.is_cancelled:
             return False
         if code == -9:
@@ -399,10 +636,11 @@ class SevenZ:
             "7z",
             f"-v{split_size}b",
             "a",
-            "-mx=0",
+            f"-mx={Config.ARCHIVE_LEVEL}",
             f"-p{pswd}",
             up_path,
             dl_path,
+            f"-mmt={Config.ARCHIVE_THREADS or 'on'}",
             "-bsp1",
             "-bse1",
             "-bb3",
@@ -418,12 +656,7 @@ class SevenZ:
             LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}")
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd, stdout=PIPE, stderr=PIPE
-        )
-        await self._sevenz_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(cmd)
         if self._listener.is_cancelled:
             return False
         if code == -9:
@@ -1,22 +1,43 @@
 from PIL import Image
-from aiofiles.os import remove, path as aiopath, makedirs
+from aiofiles.os import remove, path as aiopath, makedirs, stat as aiostat
 from asyncio import (
     create_subprocess_exec,
     gather,
     wait_for,
     sleep,
+    Semaphore,
 )
 from asyncio.subprocess import PIPE
+from json import loads
 from os import path as ospath
 from re import search as re_search, escape, split as re_split, findall as re_findall
 from time import time
 from aioshutil import rmtree
 
-from ... import LOGGER, cpu_no, DOWNLOAD_DIR
+from ... import LOGGER, bot_loop, cpu_no, cpu_eater_lock, DOWNLOAD_DIR
 from .bot_utils import cmd_exec, sync_to_async
 from .files_utils import get_mime_type, is_archive, is_archive_split, get_path_size
 from .status_utils import time_to_seconds
 
+_probe_cache = {}
+_thumb_cache = {}
+_thumb_tasks = {}
+_thumb_slots = Semaphore(max(1, cpu_no))
+
+
+def _save_jpeg(src, dst):
+    with Image.open(src) as img:
+        img.convert("RGB").save(dst, "JPEG")
+
+
+def _image_size(path):
+    with Image.open(path) as img:
+        return img.size
+
+
+async def get_image_size(path):
+    return await sync_to_async(_image_size, path, pool="cpu")
+
 
 async def create_thumb(msg, _id=""):
     if not _id:
@@ -27,14 +48,27 @@ async def create_thumb(msg, _id=""):
     await makedirs(path, exist_ok=True)
     photo_dir = await msg.download()
     output = ospath.join(path, f"{_id}.jpg")
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, output, "JPEG")
+    await sync_to_async(_save_jpeg, photo_dir, output, pool="cpu")
     await remove(photo_dir)
     return output
 
 
-async def get_media_info(path):
+async def get_fingerprint(path):
     try:
-        result = await cmd_exec(
+        st = await aiostat(path)
+    except:
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+async def _probe(path):
+    if (key := await get_fingerprint(path)) is None:
+        LOGGER.error(f"Media Probe: Mostly File not found! - File: {path}")
+        return None
+    if (entry := _probe_cache.get(key)) is not None:
+        return entry
+    try:
+        stdout, stderr, code = await cmd_exec(
             [
                 "ffprobe",
                 "-hide_banner",
@@ -43,23 +77,51 @@ async def get_media_info(path):
                 "-print_format",
                 "json",
                 "-show_format",
+                "-show_streams",
                 path,
             ]
         )
     except Exception as e:
-        LOGGER.error(f"Get Media Info: {e}. Mostly File not found! - File: {path}")
+        LOGGER.error(f"Media Probe: {e}. Mostly File not found! - File: {path}")
+        return None
+    data = {}
+    if stdout and code == 0:
+        try:
+            data = loads(stdout)
+        except ValueError:
+            LOGGER.error(f"Media Probe: {stdout}")
+    entry = {
+        "format": data.get("format"),
+        "streams": data.get("streams"),
+        "stderr": stderr,
+        "code": code,
+    }
+    if len(_probe_cache) >= 2000:
+        del _probe_cache[next(iter(_probe_cache))]
+    _probe_cache[key] = entry
+    return entry
+
+
+async def get_media_info(path):
+    entry = await _probe(path)
+    if entry is None or entry["code"] != 0:
         return 0, None, None
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("format")
-        if fields is None:
-            LOGGER.error(f"get_media_info: {result}")
-            return 0, None, None
-        duration = round(float(fields.get("duration", 0)))
-        tags = fields.get("tags", {})
-        artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
-        title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
-        return duration, artist, title
-    return 0, None, None
+    fields = entry["format"]
+    if fields is None:
+        LOGGER.error(f"get_media_info: {entry}")
+        return 0, None, None
+    duration = round(float(fields.get("duration", 0)))
+    tags = fields.get("tags", {})
+    artist = tags.get("artist") or tags.get("ARTIST") or tags.get("Artist")
+    title = tags.get("title") or tags.get("TITLE") or tags.get("Title")
+    return duration, artist, title
+
+
+async def get_media_streams(path):
+    entry = await _probe(path)
+    if entry is None or entry["code"] != 0:
+        return []
+    return entry["streams"] or []
 
 
 async def get_document_type(path):
@@ -70,26 +132,11 @@ async def get_document_type(path):
         or re_search(r".+(\.|_)(rar|7z|zip|bin)(\.0*\d+)?$", path)
     ):
         return is_video, is_audio, is_image
-    mime_type = await sync_to_async(get_mime_type, path)
+    mime_type = await sync_to_async(get_mime_type, path, pool="fs")
     if mime_type.startswith("image"):
         return False, False, True
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_streams",
-                path,
-            ]
-        )
-        if result[1] and mime_type.startswith("video"):
-            is_video = True
-    except Exception as e:
-        LOGGER.error(f"Get Document Type: {e}. Mostly File not found! - File: {path}")
+    entry = await _probe(path)
+    if entry is None:
         if mime_type.startswith("audio"):
             return False, True, False
         if not mime_type.startswith("video") and not mime_type.endswith("octet-stream"):
@@ -97,10 +144,12 @@ async def get_document_type(path):
         if mime_type.startswith("video"):
             is_video = True
         return is_video, is_audio, is_image
-    if result[0] and result[2] == 0:
-        fields = eval(result[0]).get("streams")
+    if entry["stderr"] and mime_type.startswith("video"):
+        is_video = True
+    if entry["code"] == 0:
+        fields = entry["streams"]
         if fields is None:
-            LOGGER.error(f"get_document_type: {result}")
+            LOGGER.error(f"get_document_type: {entry}")
             return is_video, is_audio, is_image
         is_video = False
         for stream in fields:
@@ -113,6 +162,46 @@ async def get_document_type(path):
     return is_video, is_audio, is_image
 
 
+async def _thumb_exec(cmd):
+    async with _thumb_slots:
+        return await wait_for(cmd_exec(cmd), timeout=60)
+
+
+async def _cached_thumb(path, kind, func, *args):
+    if (fp := await get_fingerprint(path)) is None:
+        return await func(*args)
+    key = (fp, kind)
+    if (output := _thumb_cache.get(key)) and await aiopath.exists(output):
+        _thumb_cache[key] = _thumb_cache.pop(key)
+        return output
+    task = _thumb_tasks.get(key)
+    if shared := task is not None:
+        output = await task
+    else:
+        task = _thumb_tasks[key] = bot_loop.create_task(func(*args))
+        try:
+            output = await task
+        finally:
+            del _thumb_tasks[key]
+    if not output and shared:
+        output = await func(*args)
+    if output:
+        _thumb_cache.pop(key, None)
+        while len(_thumb_cache) >= 200:
+            stale = _thumb_cache.pop(next(iter(_thumb_cache)))
+            if stale != output and await aiopath.exists(stale):
+                await remove(stale)
+        _thumb_cache[key] = output
+    return output
+
+
+async def drop_thumbnails(fp):
+    for key in [key for key in _thumb_cache if key[0] == fp]:
+        output = _thumb_cache.pop(key)
+        if await aiopath.exists(output):
+            await remove(output)
+
+
 async def take_ss(video_file, ss_nb) -> bool:
     duration = (await get_media_info(video_file))[0]
     if duration != 0:
@@ -143,9 +232,9 @@ async def take_ss(video_file, ss_nb) -> bool:
                 output,
             ]
             cap_time += interval
-            cmds.append(cmd_exec(cmd))
+            cmds.append(_thumb_exec(cmd))
         try:
-            resutls = await wait_for(gather(*cmds), timeout=60)
+            resutls = await gather(*cmds)
             if resutls[0][2] != 0:
                 LOGGER.error(
                     f"Error while creating sreenshots from video. Path: {video_file}. stderr: {resutls[0][1]}"
@@ -165,6 +254,10 @@ async def take_ss(video_file, ss_nb) -> bool:
 
 
 async def get_audio_thumbnail(audio_file):
+    return await _cached_thumb(audio_file, "audio", _audio_thumbnail, audio_file)
+
+
+async def _audio_thumbnail(audio_file):
     output_dir = f"{DOWNLOAD_DIR}thumbnails"
     await makedirs(output_dir, exist_ok=True)
     output = ospath.join(output_dir, f"{time()}.jpg")
@@ -183,7 +276,7 @@ async def get_audio_thumbnail(audio_file):
         output,
     ]
     try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
+        _, err, code = await _thumb_exec(cmd)
         if code != 0 or not await aiopath.exists(output):
             LOGGER.error(
                 f"Error while extracting thumbnail from audio. Name: {audio_file} stderr: {err}"
@@ -198,6 +291,12 @@ async def get_audio_thumbnail(audio_file):
 
 
 async def get_video_thumbnail(video_file, duration):
+    return await _cached_thumb(
+        video_file, "video", _video_thumbnail, video_file, duration
+    )
+
+
+async def _video_thumbnail(video_file, duration):
     output_dir = f"{DOWNLOAD_DIR}thumbnails"
     await makedirs(output_dir, exist_ok=True)
     output = ospath.join(output_dir, f"{time()}.jpg")
@@ -226,7 +325,7 @@ async def get_video_thumbnail(video_file, duration):
         output,
     ]
     try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
+        _, err, code = await _thumb_exec(cmd)
         if code != 0 or not await aiopath.exists(output):
             LOGGER.error(
                 f"Error while extracting thumbnail from video. Name: {video_file} stderr: {err}"
@@ -241,6 +340,19 @@ async def get_video_thumbnail(video_file, duration):
 
 
 async def get_multiple_frames_thumbnail(video_file, layout, keep_screenshots):
+    if keep_screenshots:
+        return await _multiple_frames_thumbnail(video_file, layout, True)
+    return await _cached_thumb(
+        video_file,
+        f"tile:{layout}",
+        _multiple_frames_thumbnail,
+        video_file,
+        layout,
+        False,
+    )
+
+
+async def _multiple_frames_thumbnail(video_file, layout, keep_screenshots):
     ss_nb = layout.split("x")
     ss_nb = int(ss_nb[0]) * int(ss_nb[1])
     dirpath = await take_ss(video_file, ss_nb)
@@ -271,7 +383,7 @@ async def get_multiple_frames_thumbnail(video_file, layout, keep_screenshots):
         output,
     ]
     try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
+        _, err, code = await _thumb_exec(cmd)
         if code != 0 or not await aiopath.exists(output):
             LOGGER.error(
                 f"Error while combining thumbnails for video. Name: {video_file} stderr: {err}"
@@ -369,6 +481,19 @@ class FFMpeg:
                             self._eta_raw = 0
             await sleep(0.05)
 
+    async def _run(self, cmd):
+        self._listener.progress = False
+        async with cpu_eater_lock:
+            self._listener.progress = True
+            if self._listener.is_cancelled:
+                return None, b""
+            self._listener.subproc = await create_subprocess_exec(
+                *cmd, stdout=PIPE, stderr=PIPE
+            )
+            await self._ffmpeg_progress()
+            _, stderr = await self._listener.subproc.communicate()
+            return self._listener.subproc.returncode, stderr
+
     async def ffmpeg_cmds(self, ffmpeg, f_path):
         self.clear()
         self._total_time = (await get_media_info(f_path))[0]
@@ -399,12 +524,7 @@ class FFMpeg:
             ffmpeg[index] = output
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *ffmpeg, stdout=PIPE, stderr=PIPE
-        )
-        await self._ffmpeg_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(ffmpeg)
         if self._listener.is_cancelled:
             return False
         if code == 0:
@@ -476,12 +596,7 @@ class FFMpeg:
             ]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd, stdout=PIPE, stderr=PIPE
-        )
-        await self._ffmpeg_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(cmd)
         if self._listener.is_cancelled:
             return False
         if code == 0:
@@ -523,12 +638,7 @@ class FFMpeg:
         ]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd, stdout=PIPE, stderr=PIPE
-        )
-        await self._ffmpeg_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(cmd)
         if self._listener.is_cancelled:
             return False
         if code == 0:
@@ -604,12 +714,7 @@ class FFMpeg:
 
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd, stdout=PIPE, stderr=PIPE
-        )
-        await self._ffmpeg_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(cmd)
         if self._listener.is_cancelled:
             return False
         if code == -9:
@@ -1,14 +1,31 @@
 from html import escape
 from psutil import virtual_memory, cpu_percent, disk_usage
 from time import time
-from asyncio import iscoroutinefunction, gather
+from types import MappingProxyType
+from asyncio import iscoroutinefunction, gather, sleep, Lock
+from weakref import WeakKeyDictionary
 
-from ... import task_dict, task_dict_lock, bot_start_time, status_dict, DOWNLOAD_DIR
+from ... import (
+    LOGGER,
+    task_dict,
+    bot_start_time,
+    status_dict,
+    intervals,
+    DOWNLOAD_DIR,
+)
 from ...core.config_manager import Config
 from ..telegram_helper.button_build import ButtonMaker
+from .bot_utils import new_task
 
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
 
+_fragments = WeakKeyDictionary()
+_snapshot = {"time": 0, "statuses": MappingProxyType({})}
+_snapshot_lock = Lock()
+_gid_index = {}
+_mid_gids = {}
+_sys_stats = {"time": 0, "cpu": 0, "free": "0B", "ram": 0}
+
 
 class MirrorStatus:
     STATUS_UPLOAD = "Upload"
@@ -46,38 +63,83 @@ STATUSES = {
 }
 
 
-async def get_task_by_gid(gid: str):
-    async with task_dict_lock:
-        for tk in task_dict.values():
-            if hasattr(tk, "seeding"):
-                await tk.update()
-            if tk.gid() == gid:
-                return tk
+async def get_task_status(tk):
+    if (st := _snapshot["statuses"].get(tk)) is not None:
+        return st
+    return await tk.status() if iscoroutinefunction(tk.status) else tk.status()
+
+
+async def _poll_status(tk):
+    try:
+        return await tk.status()
+    except Exception as e:
+        LOGGER.error(f"{e}: while getting status of {tk.tool} task")
         return None
 
 
+async def refresh_task_snapshot(max_age=0):
+    requested = time()
+    async with _snapshot_lock:
+        if (
+            _snapshot["time"] >= requested
+            or requested - _snapshot["time"] < max_age
+        ):
+            return
+        tasks = [tk for tk in task_dict.values() if iscoroutinefunction(tk.status)]
+        statuses = await gather(*[_poll_status(tk) for tk in tasks])
+        _snapshot["statuses"] = MappingProxyType(
+            {tk: st for tk, st in zip(tasks, statuses) if st is not None}
+        )
+        _snapshot["time"] = time()
+
+
+@new_task
+async def _task_collector():
+    while not intervals["stopAll"]:
+        if not status_dict:
+            intervals["snapshot"] = ""
+            break
+        try:
+            await refresh_task_snapshot()
+        except Exception as e:
+            LOGGER.error(str(e))
+        await sleep(Config.STATUS_UPDATE_INTERVAL)
+
+
+async def start_task_collector():
+    if not intervals["snapshot"]:
+        intervals["snapshot"] = await _task_collector()
+
+
+def index_task_gid(task, gid):
+    _gid_index[gid] = task
+    _mid_gids.setdefault(task.listener.mid, set()).add(gid)
+
+
+def drop_task_gids(mid):
+    for gid in _mid_gids.pop(mid, ()):
+        _gid_index.pop(gid, None)
+
+
+async def get_task_by_gid(gid: str):
+    if (tk := _gid_index.get(gid)) is not None and task_dict.get(
+        tk.listener.mid
+    ) is tk:
+        return tk
+    return None
+
+
 async def get_specific_tasks(status, user_id):
-    if status == "All":
-        if user_id:
-            return [tk for tk in task_dict.values() if tk.listener.user_id == user_id]
-        else:
-            return list(task_dict.values())
     tasks_to_check = (
         [tk for tk in task_dict.values() if tk.listener.user_id == user_id]
         if user_id
         else list(task_dict.values())
     )
-    coro_tasks = []
-    coro_tasks.extend(tk for tk in tasks_to_check if iscoroutinefunction(tk.status))
-    coro_statuses = await gather(*[tk.status() for tk in coro_tasks])
+    if status == "All":
+        return tasks_to_check
+    statuses = await gather(*[get_task_status(tk) for tk in tasks_to_check])
     result = []
-    coro_index = 0
-    for tk in tasks_to_check:
-        if tk in coro_tasks:
-            st = coro_statuses[coro_index]
-            coro_index += 1
-        else:
-            st = tk.status()
+    for tk, st in zip(tasks_to_check, statuses):
         if (st == status) or (
             status == MirrorStatus.STATUS_DOWNLOAD and st not in STATUSES.values()
         ):
@@ -86,8 +148,8 @@ async def get_specific_tasks(status, user_id):
 
 
 async def get_all_tasks(req_status: str, user_id):
-    async with task_dict_lock:
-        return await get_specific_tasks(req_status, user_id)
+    await refresh_task_snapshot(Config.STATUS_UPDATE_INTERVAL)
+    return await get_specific_tasks(req_status, user_id)
 
 
 def get_readable_file_size(size_in_bytes):
@@ -156,6 +218,105 @@ def get_progress_bar_string(pct):
     return f"[{p_str}]"
 
 
+def get_system_stats():
+    if time() - _sys_stats["time"] >= Config.STATUS_UPDATE_INTERVAL:
+        _sys_stats["cpu"] = cpu_percent()
+        _sys_stats["free"] = get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)
+        _sys_stats["ram"] = virtual_memory().percent
+        _sys_stats["time"] = time()
+    return _sys_stats
+
+
+def _task_snapshot(task, tstatus):
+    listener = task.listener
+    snapshot = {"status": tstatus, "name": task.name(), "gid": task.gid()}
+    if (
+        tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
+        and listener.progress
+    ):
+        snapshot.update(
+            {
+                "progress": task.progress(),
+                "processed": task.processed_bytes(),
+                "size": task.size(),
+                "speed": task.speed(),
+                "eta": task.eta(),
+            }
+        )
+        if listener.subname:
+            snapshot["subsize"] = get_readable_file_size(listener.subsize)
+            snapshot["count"] = (
+                f"{listener.proceed_count}/{len(listener.files_to_proceed) or '?'}"
+            )
+        if (
+            tstatus == MirrorStatus.STATUS_DOWNLOAD
+            and listener.is_torrent
+            or listener.is_qbit
+        ):
+            try:
+                snapshot["peers"] = (task.seeders_num(), task.leechers_num())
+            except:
+                pass
+    elif tstatus == MirrorStatus.STATUS_SEED:
+        snapshot.update(
+            {
+                "size": task.size(),
+                "seed_speed": task.seed_speed(),
+                "uploaded": task.uploaded_bytes(),
+                "ratio": task.ratio(),
+                "seeding_time": task.seeding_time(),
+            }
+        )
+    else:
+        snapshot["size"] = task.size()
+    if listener.subname:
+        snapshot["subname"] = listener.subname
+    return snapshot
+
+
+def _render_task(listener, snap):
+    if listener.is_super_chat:
+        msg = f"<a href='{listener.message.link}'>{snap['status']}</a>: </b>"
+    else:
+        msg = f"{snap['status']}: </b>"
+    name = escape(f"{snap['name']}")
+    msg += f"<code>{name}</code>"
+    if subname := snap.get("subname"):
+        msg += f"\n<i>{subname}</i>"
+    if "progress" in snap:
+        progress = snap["progress"]
+        msg += f"\n{get_progress_bar_string(progress)} {progress}"
+        subsize = f"/{snap['subsize']}" if "subsize" in snap else ""
+        msg += f"\n<b>Processed:</b> {snap['processed']}{subsize}"
+        if count := snap.get("count"):
+            msg += f"\n<b>Count:</b> {count}"
+        msg += f"\n<b>Size:</b> {snap['size']}"
+        msg += f"\n<b>Speed:</b> {snap['speed']}"
+        msg += f"\n<b>ETA:</b> {snap['eta']}"
+        if peers := snap.get("peers"):
+            msg += f"\n<b>Seeders:</b> {peers[0]} | <b>Leechers:</b> {peers[1]}"
+    elif "seed_speed" in snap:
+        msg += f"\n<b>Size: </b>{snap['size']}"
+        msg += f"\n<b>Speed: </b>{snap['seed_speed']}"
+        msg += f"\n<b>Uploaded: </b>{snap['uploaded']}"
+        msg += f"\n<b>Ratio: </b>{snap['ratio']}"
+        msg += f" | <b>Time: </b>{snap['seeding_time']}"
+    else:
+        msg += f"\n<b>Size: </b>{snap['size']}"
+    msg += f"\n<b>Gid: </b><code>{snap['gid']}</code>\n\n"
+    return msg
+
+
+def get_task_fragment(task, tstatus):
+    snapshot = _task_snapshot(task, tstatus)
+    cached = _fragments.get(task)
+    if cached is not None and cached[0] == snapshot:
+        return cached[1]
+    fragment = _render_task(task.listener, snapshot)
+    _fragments[task] = (snapshot, fragment)
+    return fragment
+
+
 async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=1):
     msg = ""
     button = None
@@ -167,9 +328,9 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
     pages = (max(tasks_no, 1) + STATUS_LIMIT - 1) // STATUS_LIMIT
     if page_no > pages:
         page_no = (page_no - 1) % pages + 1
-        status_dict[sid]["page_no"] = page_no
     elif page_no < 1:
         page_no = pages - (abs(page_no) % pages)
+    if sid in status_dict:
         status_dict[sid]["page_no"] = page_no
     start_position = (page_no - 1) * STATUS_LIMIT
 
@@ -178,54 +339,10 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
     ):
         if status != "All":
             tstatus = status
-        elif iscoroutinefunction(task.status):
-            tstatus = await task.status()
-        else:
-            tstatus = task.status()
-        if task.listener.is_super_chat:
-            msg += f"<b>{index + start_position}.<a href='{task.listener.message.link}'>{tstatus}</a>: </b>"
-        else:
-            msg += f"<b>{index + start_position}.{tstatus}: </b>"
-        msg += f"<code>{escape(f'{task.name()}')}</code>"
-        if task.listener.subname:
-            msg += f"\n<i>{task.listener.subname}</i>"
-        if (
-            tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
-            and task.listener.progress
-        ):
-            progress = task.progress()
-            msg += f"\n{get_progress_bar_string(progress)} {progress}"
-            if task.listener.subname:
-                subsize = f"/{get_readable_file_size(task.listener.subsize)}"
-                ac = len(task.listener.files_to_proceed)
-                count = f"{task.listener.proceed_count}/{ac or '?'}"
-            else:
-                subsize = ""
-                count = ""
-            msg += f"\n<b>Processed:</b> {task.processed_bytes()}{subsize}"
-            if count:
-                msg += f"\n<b>Count:</b> {count}"
-            msg += f"\n<b>Size:</b> {task.size()}"
-            msg += f"\n<b>Speed:</b> {task.speed()}"
-            msg += f"\n<b>ETA:</b> {task.eta()}"
-            if (
-                tstatus == MirrorStatus.STATUS_DOWNLOAD
-                and task.listener.is_torrent
-                or task.listener.is_qbit
-            ):
-                try:
-                    msg += f"\n<b>Seeders:</b> {task.seeders_num()} | <b>Leechers:</b> {task.leechers_num()}"
-                except:
-                    pass
-        elif tstatus == MirrorStatus.STATUS_SEED:
-            msg += f"\n<b>Size: </b>{task.size()}"
-            msg += f"\n<b>Speed: </b>{task.seed_speed()}"
-            msg += f"\n<b>Uploaded: </b>{task.uploaded_bytes()}"
-            msg += f"\n<b>Ratio: </b>{task.ratio()}"
-            msg += f" | <b>Time: </b>{task.seeding_time()}"
         else:
-            msg += f"\n<b>Size: </b>{task.size()}"
-        msg += f"\n<b>Gid: </b><code>{task.gid()}</code>\n\n"
+            tstatus = await get_task_status(task)
+        msg += f"<b>{index + start_position}."
+        msg += get_task_fragment(task, tstatus)
 
     if len(msg) == 0:
         if status == "All":
@@ -248,6 +365,7 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                 buttons.data_button(label, f"status {sid} st {status_value}")
     buttons.data_button("♻️", f"status {sid} ref", position="header")
     button = buttons.build_menu(8)
-    msg += f"<b>CPU:</b> {cpu_percent()}% | <b>FREE:</b> {get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)}"
-    msg += f"\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}"
+    stats = get_system_stats()
+    msg += f"<b>CPU:</b> {stats['cpu']}% | <b>FREE:</b> {stats['free']}"
+    msg += f"\n<b>RAM:</b> {stats['ram']}% | <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}"
     return msg, button
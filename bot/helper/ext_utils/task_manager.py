@@ -1,4 +1,5 @@
 from asyncio import Event
+from psutil import disk_usage
 
 from ... import (
     queued_dl,
@@ -6,7 +7,10 @@ from ... import (
     non_queued_up,
     non_queued_dl,
     queue_dict_lock,
+    task_dict,
+    user_data,
     LOGGER,
+    DOWNLOAD_DIR,
 )
 from ...core.config_manager import Config
 from ..mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
@@ -14,6 +18,8 @@ from .bot_utils import sync_to_async, get_telegraph_list
 from .files_utils import get_base_name
 from .links_utils import is_gdrive_id
 
+_task_meta = {}
+
 
 async def stop_duplicate_check(listener):
     if (
@@ -53,17 +59,109 @@ async def stop_duplicate_check(listener):
     return False, None
 
 
+def _prune_task_meta():
+    for mid in list(_task_meta):
+        if (
+            mid not in queued_dl
+            and mid not in queued_up
+            and mid not in non_queued_dl
+            and mid not in non_queued_up
+        ):
+            del _task_meta[mid]
+
+
+def _get_priority(listener):
+    if listener.user_id == Config.OWNER_ID or user_data.get(
+        listener.user_id, {}
+    ).get("SUDO"):
+        return 1
+    return 0
+
+
+def _running_per_user():
+    running = {}
+    for mid in non_queued_dl | non_queued_up:
+        if meta := _task_meta.get(mid):
+            running[meta["user_id"]] = running.get(meta["user_id"], 0) + 1
+    return running
+
+
+def _estimate_space(listener):
+    if listener.extract or listener.compress:
+        return listener.size * 2
+    return listener.size
+
+
+def _free_space():
+    free = disk_usage(DOWNLOAD_DIR).free - Config.STORAGE_THRESHOLD * 1024**3
+    for mid in non_queued_dl:
+        if meta := _task_meta.get(mid):
+            processed = 0
+            if (task := task_dict.get(mid)) and hasattr(task, "processed_raw"):
+                try:
+                    processed = task.processed_raw()
+                except:
+                    pass
+            free -= max(meta["reserved"] - processed, 0)
+    return free
+
+
+def _fits(reserved, free):
+    return not reserved or reserved <= free or not non_queued_dl
+
+
+def _pick_next(queue, running, free=None):
+    user_limit = Config.QUEUE_USER_LIMIT
+    candidates = []
+    for mid in queue:
+        meta = _task_meta.get(
+            mid, {"user_id": None, "priority": 0, "size": 0, "reserved": 0}
+        )
+        user_running = running.get(meta["user_id"], 0)
+        if user_limit and user_running >= user_limit:
+            continue
+        if free is not None and not _fits(meta["reserved"], free):
+            continue
+        size = (meta["size"] or float("inf")) if Config.QUEUE_SMALL_FIRST else 0
+        candidates.append((-meta["priority"], user_running, size, mid))
+    if not candidates:
+        return None
+    return min(candidates, key=lambda x: x[:3])[3]
+
+
+def get_queue_overview():
+    users = {
+        _task_meta[mid]["user_id"]
+        for mid in list(queued_dl) + list(queued_up)
+        if mid in _task_meta
+    }
+    running = _running_per_user()
+    next_dl = _pick_next(queued_dl, running, _free_space())
+    next_up = _pick_next(queued_up, running)
+    next_tasks = " ".join(
+        f"{state}:{mid}" for state, mid in [("DL", next_dl), ("UP", next_up)] if mid
+    )
+    return len(users), next_tasks or "-"
+
+
 async def check_running_tasks(listener, state="dl"):
     all_limit = Config.QUEUE_ALL
     state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
+    user_limit = Config.QUEUE_USER_LIMIT
     event = None
     is_over_limit = False
     async with queue_dict_lock:
+        _prune_task_meta()
+        _task_meta[listener.mid] = {
+            "user_id": listener.user_id,
+            "priority": _get_priority(listener),
+            "size": listener.size,
+            "reserved": _estimate_space(listener) if state == "dl" else 0,
+        }
         if state == "up" and listener.mid in non_queued_dl:
             non_queued_dl.remove(listener.mid)
         if (
-            (all_limit or state_limit)
-            and not listener.force_run
+            not listener.force_run
             and not (listener.force_upload and state == "up")
             and not (listener.force_download and state == "dl")
         ):
@@ -71,10 +169,24 @@ async def check_running_tasks(listener, state="dl"):
             up_count = len(non_queued_up)
             t_count = dl_count if state == "dl" else up_count
             is_over_limit = (
-                all_limit
-                and dl_count + up_count >= all_limit
-                and (not state_limit or t_count >= state_limit)
-            ) or (state_limit and t_count >= state_limit)
+                (
+                    all_limit
+                    and dl_count + up_count >= all_limit
+                    and (not state_limit or t_count >= state_limit)
+                )
+                or (state_limit and t_count >= state_limit)
+                or (
+                    user_limit
+                    and _running_per_user().get(listener.user_id, 0) >= user_limit
+                )
+            )
+            if (
+                not is_over_limit
+                and state == "dl"
+                and not _fits(_task_meta[listener.mid]["reserved"], _free_space())
+            ):
+                LOGGER.info(f"Not enough free space, queued: {listener.name}")
+                is_over_limit = True
             if is_over_limit:
                 event = Event()
                 if state == "dl":
@@ -102,6 +214,21 @@ async def start_up_from_queued(mid: int):
     non_queued_up.add(mid)
 
 
+async def _start_queued(queue, start_func, count=None):
+    running = _running_per_user()
+    started = 0
+    while queue and (count is None or started < count):
+        free = _free_space() if queue is queued_dl else None
+        mid = _pick_next(queue, running, free)
+        if mid is None:
+            break
+        await start_func(mid)
+        if meta := _task_meta.get(mid):
+            running[meta["user_id"]] = running.get(meta["user_id"], 0) + 1
+        started += 1
+    return started
+
+
 async def start_from_queued():
     if all_limit := Config.QUEUE_ALL:
         dl_limit = Config.QUEUE_DOWNLOAD
@@ -113,44 +240,31 @@ async def start_from_queued():
             if all_ < all_limit:
                 f_tasks = all_limit - all_
                 if queued_up and (not up_limit or up < up_limit):
-                    for index, mid in enumerate(list(queued_up.keys()), start=1):
-                        await start_up_from_queued(mid)
-                        f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
+                    count = min(f_tasks, up_limit - up) if up_limit else f_tasks
+                    f_tasks -= await _start_queued(
+                        queued_up, start_up_from_queued, count
+                    )
                 if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                        await start_dl_from_queued(mid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
+                    count = min(f_tasks, dl_limit - dl) if dl_limit else f_tasks
+                    await _start_queued(queued_dl, start_dl_from_queued, count)
         return
 
     if up_limit := Config.QUEUE_UPLOAD:
         async with queue_dict_lock:
             up = len(non_queued_up)
             if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, mid in enumerate(list(queued_up.keys()), start=1):
-                    await start_up_from_queued(mid)
-                    if index == f_tasks:
-                        break
+                await _start_queued(queued_up, start_up_from_queued, up_limit - up)
     else:
         async with queue_dict_lock:
             if queued_up:
-                for mid in list(queued_up.keys()):
-                    await start_up_from_queued(mid)
+                await _start_queued(queued_up, start_up_from_queued)
 
     if dl_limit := Config.QUEUE_DOWNLOAD:
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                    await start_dl_from_queued(mid)
-                    if index == f_tasks:
-                        break
+                await _start_queued(queued_dl, start_dl_from_queued, dl_limit - dl)
     else:
         async with queue_dict_lock:
             if queued_dl:
-                for mid in list(queued_dl.keys()):
-                    await start_dl_from_queued(mid)
+                await _start_queued(queued_dl, start_dl_from_queued)
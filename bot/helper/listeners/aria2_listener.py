@@ -7,7 +7,7 @@ from aiohttp.client_exceptions import ClientError
 from ... import task_dict_lock, task_dict, LOGGER, intervals
 from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager, is_metadata, aria2_name
-from ..ext_utils.bot_utils import bt_selection_buttons
+from ..ext_utils.bot_utils import bt_selection_buttons, new_task
 from ..ext_utils.files_utils import clean_unwanted
 from ..ext_utils.status_utils import get_task_by_gid
 from ..ext_utils.task_manager import stop_duplicate_check
@@ -21,7 +21,7 @@ from ..telegram_helper.message_utils import (
 
 async def _on_download_started(api, data):
     gid = data["params"][0]["gid"]
-    download = await api.tellStatus(gid)
+    download = await TorrentManager.aria2_status(gid)
     options = await api.getOption(gid)
     if options.get("follow-torrent", "") == "false":
         return
@@ -40,7 +40,7 @@ async def _on_download_started(api, data):
                     ):
                         await delete_message(meta)
                         break
-                    download = await api.tellStatus(gid)
+                    download = await TorrentManager.aria2_status(gid)
         return
     else:
         LOGGER.info(f"onDownloadStarted: {aria2_name(download)} - Gid: {gid}")
@@ -48,7 +48,7 @@ async def _on_download_started(api, data):
 
     await sleep(2)
     if task := await get_task_by_gid(gid):
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2_status(gid)
         if "bittorrent" in download:
             task.listener.is_torrent = True
         task.listener.name = aria2_name(download)
@@ -61,7 +61,7 @@ async def _on_download_started(api, data):
 async def _on_download_complete(api, data):
     try:
         gid = data["params"][0]["gid"]
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2_status(gid)
         options = await api.getOption(gid)
     except (TimeoutError, ClientError, Exception) as e:
         LOGGER.error(f"onDownloadComplete: {e}")
@@ -71,7 +71,8 @@ async def _on_download_complete(api, data):
     if download.get("followedBy", []):
         new_gid = download.get("followedBy", [])[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
-        if task := await get_task_by_gid(new_gid):
+        if task := await get_task_by_gid(gid):
+            await task.update()
             task.listener.is_torrent = True
             if Config.BASE_URL and task.listener.select:
                 if not task.queued:
@@ -102,7 +103,7 @@ async def _on_download_complete(api, data):
 async def _on_bt_download_complete(api, data):
     gid = data["params"][0]["gid"]
     await sleep(1)
-    download = await api.tellStatus(gid)
+    download = await TorrentManager.aria2_status(gid)
     LOGGER.info(f"onBtDownloadComplete: {aria2_name(download)} - Gid: {gid}")
     if task := await get_task_by_gid(gid):
         task.listener.is_torrent = True
@@ -133,7 +134,7 @@ async def _on_bt_download_complete(api, data):
         await task.listener.on_download_complete()
         if intervals["stopAll"]:
             return
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2_status(gid)
         if (
             task.listener.seed
             and download.get("status", "") == "complete"
@@ -176,7 +177,7 @@ async def _on_download_error(api, data):
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
     with suppress(TimeoutError, ClientError, Exception):
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2_status(gid)
         options = await api.getOption(gid)
         error = download.get("errorMessage", "")
         LOGGER.info(f"Download Error: {error}")
@@ -186,6 +187,39 @@ async def _on_download_error(api, data):
         await task.listener.on_download_error(error)
 
 
+async def _stream_completed_files(download):
+    task = await get_task_by_gid(download["gid"])
+    if not task or not task.listener.stream_leech:
+        return
+    for file in download["files"]:
+        if (
+            file["selected"] == "true"
+            and int(file["length"])
+            and file["completedLength"] == file["length"]
+        ):
+            await task.listener.on_file_complete(file["path"])
+
+
+@new_task
+async def _aria2_listener():
+    while not intervals["stopAll"]:
+        try:
+            if not await TorrentManager.sync_aria2():
+                intervals["aria2"] = ""
+                break
+            for download in list(TorrentManager.aria2_state.values()):
+                if download["status"] == "active" and len(download["files"]) > 1:
+                    await _stream_completed_files(download)
+        except (TimeoutError, ClientError, Exception) as e:
+            LOGGER.error(f"Aria2c, while syncing downloads state: {e}")
+        await sleep(1)
+
+
+async def start_aria2_listener():
+    if not intervals["aria2"]:
+        intervals["aria2"] = await _aria2_listener()
+
+
 def add_aria2_callbacks():
     TorrentManager.aria2.onBtDownloadComplete(_on_bt_download_complete)
     TorrentManager.aria2.onDownloadComplete(_on_download_complete)
@@ -1,8 +1,18 @@
-from asyncio import sleep, TimeoutError
+from asyncio import (
+    sleep,
+    gather,
+    wait,
+    create_task,
+    Semaphore,
+    TimeoutError,
+    FIRST_EXCEPTION,
+)
 from aiohttp.client_exceptions import ClientError
 
 from ... import LOGGER
+from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager, aria2_name
+from .aria2_listener import start_aria2_listener
 
 
 class DirectListener:
@@ -12,66 +22,106 @@ class DirectListener:
         self._a2c_opt = a2c_opt
         self._proc_bytes = 0
         self._failed = 0
-        self.download_task = None
+        self._downloads = {}
         self.name = self.listener.name
 
+    @property
+    def download_task(self):
+        return next(iter(self._downloads.values()), None)
+
     @property
     def processed_bytes(self):
-        if self.download_task:
-            return self._proc_bytes + int(
-                self.download_task.get("completedLength", "0")
-            )
-        return self._proc_bytes
+        return self._proc_bytes + sum(
+            int(download.get("completedLength", "0"))
+            for download in self._downloads.values()
+        )
 
     @property
     def speed(self):
-        return (
-            int(self.download_task.get("downloadSpeed", "0"))
-            if self.download_task
-            else 0
+        return sum(
+            int(download.get("downloadSpeed", "0"))
+            for download in self._downloads.values()
         )
 
-    async def download(self, contents):
-        self.is_downloading = True
-        for content in contents:
-            if self.listener.is_cancelled:
-                break
-            if content["path"]:
-                self._a2c_opt["dir"] = f"{self._path}/{content['path']}"
-            else:
-                self._a2c_opt["dir"] = self._path
-            filename = content["filename"]
-            self._a2c_opt["out"] = filename
-            try:
-                gid = await TorrentManager.aria2.addUri(
-                    uris=[content["url"]], options=self._a2c_opt, position=0
-                )
-            except (TimeoutError, ClientError, Exception) as e:
-                self._failed += 1
-                LOGGER.error(f"Unable to download {filename} due to: {e}")
-                continue
-            self.download_task = await TorrentManager.aria2.tellStatus(gid)
+    async def _download_file(self, content):
+        a2c_opt = self._a2c_opt.copy()
+        if content["path"]:
+            a2c_opt["dir"] = f"{self._path}/{content['path']}"
+        else:
+            a2c_opt["dir"] = self._path
+        filename = content["filename"]
+        a2c_opt["out"] = filename
+        try:
+            gid = await TorrentManager.aria2.addUri(
+                uris=[content["url"]], options=a2c_opt, position=0
+            )
+        except (TimeoutError, ClientError, Exception) as e:
+            self._failed += 1
+            LOGGER.error(f"Unable to download {filename} due to: {e}")
+            return
+        self._downloads[gid] = await TorrentManager.aria2_status(gid)
+        await start_aria2_listener()
+        try:
             while True:
+                download = self._downloads[gid]
                 if self.listener.is_cancelled:
-                    if self.download_task:
-                        await TorrentManager.aria2_remove(self.download_task)
+                    if download:
+                        await TorrentManager.aria2_remove(download)
                     break
-                self.download_task = await TorrentManager.aria2.tellStatus(gid)
-                if error_message := self.download_task.get("errorMessage"):
+                download = TorrentManager.aria2_state.get(gid, download)
+                self._downloads[gid] = download
+                if error_message := download.get("errorMessage"):
                     self._failed += 1
                     LOGGER.error(
-                        f"Unable to download {aria2_name(self.download_task)} due to: {error_message}"
+                        f"Unable to download {aria2_name(download)} due to: {error_message}"
                     )
-                    await TorrentManager.aria2_remove(self.download_task)
+                    del self._downloads[gid]
+                    await TorrentManager.aria2_remove(download)
                     break
-                elif self.download_task.get("status", "") == "complete":
-                    self._proc_bytes += int(self.download_task.get("totalLength", "0"))
-                    await TorrentManager.aria2_remove(self.download_task)
+                elif download.get("status", "") == "complete":
+                    self._proc_bytes += int(download.get("totalLength", "0"))
+                    del self._downloads[gid]
+                    await TorrentManager.aria2_remove(download)
                     break
                 await sleep(1)
-            self.download_task = None
+        finally:
+            self._downloads.pop(gid, None)
+
+    async def download(self, contents):
+        self.is_downloading = True
+        semaphore = Semaphore(max(Config.DIRECT_CONCURRENT_DOWNLOADS, 1))
+
+        async def _worker(content):
+            async with semaphore:
+                if not self.listener.is_cancelled:
+                    await self._download_file(content)
+
+        tasks = [create_task(_worker(content)) for content in contents]
+        done, pending = await wait(tasks, return_when=FIRST_EXCEPTION)
+        error = next(
+            (
+                task.exception()
+                for task in done
+                if not task.cancelled() and task.exception()
+            ),
+            None,
+        )
+        if pending:
+            downloads = list(self._downloads.values())
+            for task in pending:
+                task.cancel()
+            await gather(*pending, return_exceptions=True)
+            for download in downloads:
+                try:
+                    await TorrentManager.aria2_remove(download)
+                except Exception:
+                    pass
         if self.listener.is_cancelled:
             return
+        if error is not None:
+            LOGGER.error(f"Direct download failed: {error}")
+            await self.listener.on_download_error(str(error) or "Download failed!")
+            return
         if self._failed == len(contents):
             await self.listener.on_download_error("All files are failed to download!")
             return
@@ -82,5 +132,5 @@ class DirectListener:
         self.listener.is_cancelled = True
         LOGGER.info(f"Cancelling Download: {self.listener.name}")
         await self.listener.on_download_error("Download Cancelled by User!")
-        if self.download_task:
-            await TorrentManager.aria2_remove(self.download_task)
+        for download in list(self._downloads.values()):
+            await TorrentManager.aria2_remove(download)
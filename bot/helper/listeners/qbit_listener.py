@@ -63,6 +63,19 @@ async def _stop_duplicate(tor):
                 _on_download_error(msg, tor, button)
 
 
+async def _stream_completed_files(tor):
+    task = await get_task_by_gid(tor.hash[:12])
+    if not task or not task.listener.stream_leech:
+        return
+    path = tor.content_path.rsplit("/", 1)[0]
+    res = await TorrentManager.qbittorrent.torrents.files(tor.hash)
+    if len(res) < 2:
+        return
+    for f in res:
+        if f.priority != 0 and f.progress == 1:
+            await task.listener.on_file_complete(f"{path}/{f.name}")
+
+
 @new_task
 async def _on_download_complete(tor):
     ext_hash = tor.hash
@@ -88,7 +101,7 @@ async def _on_download_complete(tor):
                 if task.listener.mid in task_dict:
                     removed = False
                     task_dict[task.listener.mid] = QbittorrentStatus(
-                        task.listener, True
+                        task.listener, tor, True
                     )
                 else:
                     removed = True
@@ -111,13 +124,19 @@ async def _on_download_complete(tor):
 @new_task
 async def _qb_listener():
     while True:
+        to_stream = []
         async with qb_listener_lock:
             try:
-                torrents = await TorrentManager.qbittorrent.torrents.info()
+                torrents = await TorrentManager.sync_qbittorrent()
                 if len(torrents) == 0:
+                    TorrentManager.reset_qbittorrent_state()
                     intervals["qb"] = ""
                     break
-                for tor_info in torrents:
+                to_reannounce = []
+                to_recheck = []
+                for tor_info in list(torrents.values()):
+                    if not tor_info.tags:
+                        continue
                     tag = tor_info.tags[0]
                     if tag not in qb_torrents:
                         continue
@@ -131,14 +150,16 @@ async def _qb_listener():
                         ):
                             await _on_download_error("Dead Torrent!", tor_info)
                         else:
-                            await TorrentManager.qbittorrent.torrents.reannounce(
-                                [tor_info.hash]
-                            )
+                            to_reannounce.append(tor_info.hash)
                     elif state == "downloading":
                         qb_torrents[tag]["stalled_time"] = time()
                         if not qb_torrents[tag]["stop_dup_check"]:
                             qb_torrents[tag]["stop_dup_check"] = True
                             await _stop_duplicate(tor_info)
+                        mark = (getattr(tor_info, "completed", 0), tor_info.progress)
+                        if qb_torrents[tag]["stream_mark"] != mark:
+                            qb_torrents[tag]["stream_mark"] = mark
+                            to_stream.append(tor_info)
                     elif state == "stalledDL":
                         if (
                             not qb_torrents[tag]["rechecked"]
@@ -148,9 +169,7 @@ async def _qb_listener():
                             msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
                             msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
                             LOGGER.warning(msg)
-                            await TorrentManager.qbittorrent.torrents.recheck(
-                                [tor_info.hash]
-                            )
+                            to_recheck.append(tor_info.hash)
                             qb_torrents[tag]["rechecked"] = True
                         elif (
                             Config.TORRENT_TIMEOUT
@@ -159,13 +178,9 @@ async def _qb_listener():
                         ):
                             await _on_download_error("Dead Torrent!", tor_info)
                         else:
-                            await TorrentManager.qbittorrent.torrents.reannounce(
-                                [tor_info.hash]
-                            )
+                            to_reannounce.append(tor_info.hash)
                     elif state == "missingFiles":
-                        await TorrentManager.qbittorrent.torrents.recheck(
-                            [tor_info.hash]
-                        )
+                        to_recheck.append(tor_info.hash)
                     elif state == "error":
                         await _on_download_error(
                             "No enough space for this torrent on device", tor_info
@@ -190,6 +205,15 @@ async def _qb_listener():
                         qb_torrents[tag]["seeding"] = False
                         await _on_seed_finish(tor_info)
                         await sleep(0.5)
+                if to_reannounce:
+                    await TorrentManager.qbittorrent.torrents.reannounce(to_reannounce)
+                if to_recheck:
+                    await TorrentManager.qbittorrent.torrents.recheck(to_recheck)
+            except (ClientError, TimeoutError, Exception, AQError) as e:
+                LOGGER.error(str(e))
+        for tor_info in to_stream:
+            try:
+                await _stream_completed_files(tor_info)
             except (ClientError, TimeoutError, Exception, AQError) as e:
                 LOGGER.error(str(e))
         await sleep(3)
@@ -204,6 +228,7 @@ async def on_download_start(tag):
             "rechecked": False,
             "uploaded": False,
             "seeding": False,
+            "stream_mark": None,
         }
         if not intervals["qb"]:
             intervals["qb"] = await _qb_listener()
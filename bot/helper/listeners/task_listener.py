@@ -1,6 +1,8 @@
-from aiofiles.os import path as aiopath, listdir, remove
-from asyncio import sleep, gather
+from aiofiles.os import path as aiopath, listdir, remove, makedirs, link
+from asyncio import sleep, gather, Queue
 from html import escape
+from natsort import natsorted
+from os import path as ospath
 from requests import utils as rutils
 
 from ... import (
@@ -19,7 +21,7 @@ from ... import (
 from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager
 from ..common import TaskConfig
-from ..ext_utils.bot_utils import sync_to_async
+from ..ext_utils.bot_utils import sync_to_async, new_task
 from ..ext_utils.db_handler import database
 from ..ext_utils.files_utils import (
     get_path_size,
@@ -31,9 +33,9 @@ from ..ext_utils.files_utils import (
     move_and_merge,
 )
 from ..ext_utils.links_utils import is_gdrive_id
-from ..ext_utils.status_utils import get_readable_file_size
+from ..ext_utils.status_utils import get_readable_file_size, drop_task_gids
 from ..ext_utils.task_manager import start_from_queued, check_running_tasks
-from ..ext_utils.media_utils import get_document_type
+from ..ext_utils.media_utils import get_document_type, FFMpeg
 from ..mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload
 from ..mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from ..mirror_leech_utils.status_utils.gdrive_status import GoogleDriveStatus
@@ -53,6 +55,89 @@ from ..telegram_helper.message_utils import (
 class TaskListener(TaskConfig):
     def __init__(self):
         super().__init__()
+        self._stream_queue = None
+        self._stream_task = None
+        self._stream_uploader = None
+        self._streamed = set()
+
+    @property
+    def stream_leech(self):
+        return (
+            Config.LEECH_STREAMING
+            and self.is_leech
+            and not (
+                self.seed
+                or self.same_dir
+                or self.join
+                or self.extract
+                or self.compress
+                or self.ffmpeg_cmds
+                or self.name_sub
+                or self.screen_shots
+                or self.convert_audio
+                or self.convert_video
+                or self.sample_video
+            )
+        )
+
+    async def on_file_complete(self, f_path):
+        if (
+            self.is_cancelled
+            or f_path in self._streamed
+            or not f_path.startswith(f"{self.dir}/")
+            or f_path.strip().lower().endswith(tuple(self.excluded_extensions))
+        ):
+            return
+        self._streamed.add(f_path)
+        if self._stream_queue is None:
+            self.up_dir = f"{self.dir}10000"
+            self._stream_queue = Queue()
+            self._stream_uploader = TelegramUploader(self, self.dir)
+            self._stream_task = await self._stream_upload()
+        self._stream_queue.put_nowait(f_path)
+
+    @new_task
+    async def _stream_upload(self):
+        tg = self._stream_uploader
+        if not await tg.prepare():
+            return
+        ffmpeg = FFMpeg(self)
+        while (f_path := await self._stream_queue.get()) is not None:
+            if self.is_cancelled:
+                return
+            s_path = f"{self.up_dir}{f_path.replace(self.dir, '', 1)}"
+            s_dir, file_ = ospath.split(s_path)
+            try:
+                await makedirs(s_dir, exist_ok=True)
+                await link(f_path, s_path)
+                existing = set(await listdir(s_dir)) - {file_}
+                f_size = await aiopath.getsize(s_path)
+                if f_size > self.split_size and not await self.split_one(
+                    ffmpeg, s_path, f_size, file_
+                ):
+                    return
+                parts = [
+                    part
+                    for part in natsorted(set(await listdir(s_dir)) - existing)
+                    if await aiopath.isfile(ospath.join(s_dir, part))
+                ]
+                for part in parts:
+                    if not await tg.upload_file(s_dir, part):
+                        return
+            except Exception as e:
+                LOGGER.error(f"Unable to stream {f_path}: {e}")
+                continue
+            tg.mark_streamed(f_path)
+
+    def is_streamed(self, f_path):
+        tg = self._stream_uploader
+        return tg is not None and tg.is_streamed(f_path)
+
+    async def stop_stream_upload(self):
+        if self._stream_task is None:
+            return
+        self._stream_queue.put_nowait(None)
+        await self._stream_task
 
     async def clean(self):
         try:
@@ -173,7 +258,7 @@ class TaskListener(TaskConfig):
             up_dir = self.dir
             up_path = dl_path
 
-        await remove_excluded_files(self.up_dir or self.dir, self.excluded_extensions)
+        await remove_excluded_files(up_dir, self.excluded_extensions)
 
         if not Config.QUEUE_ALL:
             async with queue_dict_lock:
@@ -182,7 +267,7 @@ class TaskListener(TaskConfig):
             await start_from_queued()
 
         if self.join and not self.is_file:
-            await join_files(up_path)
+            await join_files(up_path, bool(self.extract) and not self.is_nzb)
 
         if self.extract and not self.is_nzb:
             up_path = await self.proceed_extract(up_path, gid)
@@ -263,6 +348,11 @@ class TaskListener(TaskConfig):
         self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
         self.size = await get_path_size(up_dir)
 
+        if self.is_leech:
+            await self.stop_stream_upload()
+            if self.is_cancelled:
+                return
+
         if self.is_leech and not self.compress:
             await self.proceed_split(up_path, gid)
             if self.is_cancelled:
@@ -286,7 +376,7 @@ class TaskListener(TaskConfig):
 
         if self.is_leech:
             LOGGER.info(f"Leech Name: {self.name}")
-            tg = TelegramUploader(self, up_dir)
+            tg = self._stream_uploader or TelegramUploader(self, up_dir)
             async with task_dict_lock:
                 task_dict[self.mid] = TelegramStatus(self, tg, gid, "up")
             await gather(
@@ -301,7 +391,7 @@ class TaskListener(TaskConfig):
                 task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "up")
             await gather(
                 update_status_message(self.message.chat.id),
-                sync_to_async(drive.upload),
+                sync_to_async(drive.upload, pool="transfer"),
             )
             del drive
         else:
@@ -399,9 +489,12 @@ class TaskListener(TaskConfig):
             await start_from_queued()
             return
         await clean_download(self.dir)
+        if self.up_dir:
+            await clean_download(self.up_dir)
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
+            drop_task_gids(self.mid)
             count = len(task_dict)
         if count == 0:
             await self.clean()
@@ -415,9 +508,12 @@ class TaskListener(TaskConfig):
         await start_from_queued()
 
     async def on_download_error(self, error, button=None):
+        if self._stream_queue is not None:
+            self._stream_queue.put_nowait(None)
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
+            drop_task_gids(self.mid)
             count = len(task_dict)
         await self.remove_from_same_dir()
         msg = f"{self.tag} Download: {escape(str(error))}"
@@ -455,9 +551,12 @@ class TaskListener(TaskConfig):
             await remove(self.thumb)
 
     async def on_upload_error(self, error):
+        if self._stream_queue is not None:
+            self._stream_queue.put_nowait(None)
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
+            drop_task_gids(self.mid)
             count = len(task_dict)
         await send_message(self.message, f"{self.tag} {escape(str(error))}")
         if count == 0:
@@ -9,6 +9,7 @@ from ....core.config_manager import Config
 from ....core.torrent_manager import TorrentManager, is_metadata, aria2_name
 from ...ext_utils.bot_utils import bt_selection_buttons
 from ...ext_utils.task_manager import check_running_tasks
+from ...listeners.aria2_listener import start_aria2_listener
 from ...mirror_leech_utils.status_utils.aria2_status import Aria2Status
 from ...telegram_helper.message_utils import send_status_message, send_message
 
@@ -49,7 +50,7 @@ async def add_aria2_download(listener, dpath, header, ratio, seed_time):
         LOGGER.info(f"Aria2c Download Error: {e}")
         await listener.on_download_error(f"{e}")
         return
-    download = await TorrentManager.aria2.tellStatus(gid)
+    download = await TorrentManager.aria2_status(gid)
     if download.get("errorMessage"):
         error = str(download["errorMessage"]).replace("<", " ").replace(">", " ")
         LOGGER.info(f"Aria2c Download Error: {error}")
@@ -62,6 +63,7 @@ async def add_aria2_download(listener, dpath, header, ratio, seed_time):
     name = aria2_name(download)
     async with task_dict_lock:
         task_dict[listener.mid] = Aria2Status(listener, gid, queued=add_to_queue)
+    await start_aria2_listener()
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {name}. Gid: {gid}")
         if (
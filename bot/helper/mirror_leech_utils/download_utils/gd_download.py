@@ -51,4 +51,4 @@ async def add_gd_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(drive.download)
+    await sync_to_async(drive.download, pool="transfer")
@@ -1,6 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.errors import HttpError
 from logging import getLogger
-from os import path as ospath
+from threading import Condition, Lock
 from tenacity import (
     retry,
     wait_exponential,
@@ -8,18 +9,70 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
-from time import time
+from time import time, sleep
 
+from ....core.config_manager import Config
 from ...ext_utils.bot_utils import async_to_sync
-from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from ...mirror_leech_utils.gdrive_utils.helper import (
+    GoogleDriveHelper,
+    DriveState,
+    ThreadedService,
+)
 
 LOGGER = getLogger(__name__)
 
+_records = DriveState("gdrive_clones.json")
+
+
+class _Throttle:
+    def __init__(self, limit):
+        self._max = limit
+        self._limit = limit
+        self._active = 0
+        self._successes = 0
+        self._until = 0
+        self._cond = Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+            delay = self._until - time()
+        if delay > 0:
+            sleep(delay)
+
+    def __exit__(self, *_):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def slow_down(self, delay):
+        with self._cond:
+            self._limit = max(1, self._limit // 2)
+            self._successes = 0
+            self._until = max(self._until, time() + delay)
+
+    def speed_up(self):
+        with self._cond:
+            self._successes += 1
+            if self._limit < self._max and self._successes >= self._limit * 10:
+                self._limit += 1
+                self._successes = 0
+                self._cond.notify()
 
-class GoogleDriveClone(GoogleDriveHelper):
+
+class GoogleDriveClone(ThreadedService, GoogleDriveHelper):
     def __init__(self, listener):
         self.listener = listener
         self._start_time = time()
+        self._lock = Lock()
+        self._workers = max(1, Config.GDRIVE_CONCURRENT_CLONES)
+        self._throttle = _Throttle(self._workers)
+        self._failed = False
+        self._record_key = ""
+        self._done = {}
+        self._unsaved = 0
         super().__init__()
         self.is_cloning = True
         self.user_setting()
@@ -58,15 +111,30 @@ class GoogleDriveClone(GoogleDriveHelper):
             meta = self.get_file_metadata(file_id)
             mime_type = meta.get("mimeType")
             if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                dir_id = self.create_directory(meta.get("name"), self.listener.up_dest)
-                self._clone_folder(meta.get("name"), meta.get("id"), dir_id)
+                self._record_key = f"{meta.get('id')}:{self.listener.up_dest}"
+                self._done = _records.get(self._record_key) or {}
+                dir_id = self._done.get(meta.get("id"))
+                if dir_id and self._is_alive(dir_id):
+                    LOGGER.info(f"Resuming clone of {meta.get('name')} into {dir_id}")
+                else:
+                    dir_id = self.create_directory(
+                        meta.get("name"), self.listener.up_dest
+                    )
+                    self._done = {meta.get("id"): dir_id}
+                try:
+                    self._clone_folder(meta.get("name"), meta.get("id"), dir_id)
+                finally:
+                    _records.set(self._record_key, self._done)
                 durl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
                 if self.listener.is_cancelled:
                     LOGGER.info("Deleting cloned data from Drive...")
+                    _records.pop(self._record_key)
                     self.service.files().delete(
                         fileId=dir_id, supportsAllDrives=True
                     ).execute()
                     return None, None, None, None, None
+                _records.pop(self._record_key)
+                self.invalidate_tree(self.listener.up_dest)
                 mime_type = "Folder"
                 self.listener.size = self.proc_bytes
             else:
@@ -99,49 +167,115 @@ class GoogleDriveClone(GoogleDriveHelper):
                 msg = "File not found."
             else:
                 msg = f"Error.\n{err}"
-            async_to_sync(self.listener.on_upload_error, msg)
+            async_to_sync(self.listener.on_upload_error, msg, wait=False)
             return None, None, None, None, None
 
+    def _is_alive(self, file_id):
+        try:
+            return not (
+                self.service.files()
+                .get(fileId=file_id, supportsAllDrives=True, fields="trashed")
+                .execute()
+                .get("trashed")
+            )
+        except HttpError:
+            return False
+
+    def _run_jobs(self, pool, func, jobs):
+        futures = [pool.submit(func, *job) for job in jobs]
+        for future in futures:
+            future.result()
+
+    def _save_progress(self):
+        with self._lock:
+            self._unsaved += 1
+            if self._unsaved >= 200:
+                self._unsaved = 0
+                _records.set(self._record_key, self._done.copy())
+
+    def _clone_dir(self, item, parent):
+        if self.listener.is_cancelled or self._failed:
+            return
+        try:
+            if (dir_id := self._done.get(item["id"])) is None:
+                if self.service is None:
+                    self.service = self.authorize()
+                with self._throttle:
+                    dir_id = self.create_directory(item["name"], self._done[parent])
+                self._done[item["id"]] = dir_id
+                self._save_progress()
+        except:
+            self._failed = True
+            raise
+        with self._lock:
+            self.total_folders += 1
+
+    def _clone_file(self, item, parent):
+        if self.listener.is_cancelled or self._failed:
+            return
+        try:
+            if item["id"] not in self._done:
+                if self.service is None:
+                    self.service = self.authorize()
+                file = self._copy_file(item["id"], self._done[parent])
+                if self.listener.is_cancelled:
+                    return
+                self._done[item["id"]] = file.get("id") if file else ""
+                self._save_progress()
+        except:
+            self._failed = True
+            raise
+        with self._lock:
+            self.total_files += 1
+            self.proc_bytes += int(item.get("size", 0))
+            self.total_time = int(time() - self._start_time)
+
     def _clone_folder(self, folder_name, folder_id, dest_id):
         LOGGER.info(f"Syncing: {folder_name}")
-        files = self.get_files_by_folder_id(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
-            if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._clone_folder(file_path, file.get("id"), current_dir_id)
-            elif (
-                not file.get("name")
-                .strip()
-                .lower()
-                .endswith(tuple(self.listener.excluded_extensions))
-            ):
-                self.total_files += 1
-                self._copy_file(file.get("id"), dest_id)
-                self.proc_bytes += int(file.get("size", 0))
-                self.total_time = int(time() - self._start_time)
-            if self.listener.is_cancelled:
-                break
+        levels, files = self.get_tree(folder_id)
+        with ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="gdclone"
+        ) as pool:
+            for level in levels:
+                self._run_jobs(pool, self._clone_dir, level)
+            self._run_jobs(
+                pool,
+                self._clone_file,
+                [
+                    (item, parent)
+                    for item, parent in files
+                    if not item.get("name")
+                    .strip()
+                    .lower()
+                    .endswith(tuple(self.listener.excluded_extensions))
+                ],
+            )
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def _copy_file(self, file_id, dest_id):
+    def _copy_file(self, file_id, dest_id, attempt=0):
         body = {"parents": [dest_id]}
         try:
-            return (
-                self.service.files()
-                .copy(fileId=file_id, body=body, supportsAllDrives=True)
-                .execute()
-            )
+            with self._throttle:
+                file = (
+                    self.service.files()
+                    .copy(fileId=file_id, body=body, supportsAllDrives=True)
+                    .execute()
+                )
+            self._throttle.speed_up()
+            return file
         except HttpError as err:
             if err.resp.get("content-type", "").startswith("application/json"):
                 reason = eval(err.content).get("error").get("errors")[0].get("reason")
+                if (
+                    err.resp.status == 429 or reason == "rateLimitExceeded"
+                ) and attempt < 8:
+                    LOGGER.warning(f"Got: {reason}, slowing down clone requests")
+                    self._throttle.slow_down(2**attempt)
+                    return self._copy_file(file_id, dest_id, attempt + 1)
                 if reason not in [
                     "userRateLimitExceeded",
                     "dailyLimitExceeded",
@@ -159,6 +293,7 @@ class GoogleDriveClone(GoogleDriveHelper):
                     else:
                         if self.listener.is_cancelled:
                             return
+                        self._throttle.slow_down(3)
                         self.switch_service_account()
                         return self._copy_file(file_id, dest_id)
                 else:
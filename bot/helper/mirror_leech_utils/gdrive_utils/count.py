@@ -61,20 +61,10 @@ class GoogleDriveCount(GoogleDriveHelper):
         self.proc_bytes += size
 
     def _gdrive_directory(self, drive_folder):
-        files = self.get_files_by_folder_id(drive_folder["id"])
-        if len(files) == 0:
-            return
-        for filee in files:
-            shortcut_details = filee.get("shortcutDetails")
-            if shortcut_details is not None:
-                mime_type = shortcut_details["targetMimeType"]
-                file_id = shortcut_details["targetId"]
-                filee = self.get_file_metadata(file_id)
-            else:
-                mime_type = filee.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                self._gdrive_directory(filee)
-            else:
-                self.total_files += 1
-                self._gdrive_file(filee)
+        levels, files = self.get_tree(drive_folder["id"], True, cached=True)
+        self.total_folders += sum(len(level) for level in levels)
+        for filee, _ in files:
+            if (shortcut_details := filee.get("shortcutDetails")) is not None:
+                filee = self.get_file_metadata(shortcut_details["targetId"])
+            self.total_files += 1
+            self._gdrive_file(filee)
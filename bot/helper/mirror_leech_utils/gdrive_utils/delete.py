@@ -21,6 +21,7 @@ class GoogleDriveDelete(GoogleDriveHelper):
             self.service.files().delete(
                 fileId=file_id, supportsAllDrives=True
             ).execute()
+            self.invalidate_tree(file_id)
             msg = "Successfully deleted"
             LOGGER.info(f"Delete Result: {msg}")
         except HttpError as err:
@@ -54,25 +54,26 @@ class GoogleDriveDownload(GoogleDriveHelper):
                     self._updater.cancel()
                     return self.download()
                 err = "File not found!"
-            async_to_sync(self.listener.on_download_error, err)
             self.listener.is_cancelled = True
+            async_to_sync(self.listener.on_download_error, err, wait=False)
         finally:
             self._updater.cancel()
             if self.listener.is_cancelled:
                 return
-            async_to_sync(self.listener.on_download_complete)
+            async_to_sync(self.listener.on_download_complete, wait=False)
             return
 
     def _download_folder(self, folder_id, path, folder_name):
         folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
-        path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
-            return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
+        paths = {folder_id: f"{path}/{folder_name}"}
+        makedirs(paths[folder_id], exist_ok=True)
+        levels, files = self.get_tree(folder_id, True)
+        for level in levels:
+            for item, parent in level:
+                paths[item["id"]] = f"{paths[parent]}/{item['name'].replace('/', '')}"
+                makedirs(paths[item["id"]], exist_ok=True)
+        for item, parent in sorted(files, key=lambda k: k[0]["name"]):
+            path = paths[parent]
             file_id = item["id"]
             filename = item["name"]
             shortcut_details = item.get("shortcutDetails")
@@ -81,10 +82,8 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 mime_type = shortcut_details["targetMimeType"]
             else:
                 mime_type = item.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}"
+            if not ospath.isfile(
+                f"{path}/{filename}"
             ) and not filename.strip().lower().endswith(
                 tuple(self.listener.excluded_extensions)
             ):
@@ -1,12 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.http import build_http
+from json import dump, load
 from logging import getLogger, ERROR
-from os import path as ospath, listdir
+from os import path as ospath, listdir, replace
 from pickle import load as pload
 from random import randrange
 from re import search as re_search
+from threading import Lock, local
+from time import time
 from urllib.parse import parse_qs, urlparse
 from tenacity import (
     retry,
@@ -21,6 +25,72 @@ from ...ext_utils.links_utils import is_gdrive_id
 LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
 
+LIST_BATCH = 40
+LIST_WORKERS = 8
+TREE_TTL = 300
+_trees = {}
+_trees_lock = Lock()
+
+
+class DriveState:
+    def __init__(self, path, max_age=6 * 24 * 3600):
+        self._path = path
+        self._max_age = max_age
+        self._data = None
+        self._lock = Lock()
+
+    def _store(self):
+        if self._data is None:
+            try:
+                with open(self._path) as f:
+                    self._data = {
+                        key: value
+                        for key, value in load(f).items()
+                        if time() - value[1] < self._max_age
+                    }
+            except:
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        try:
+            with open(f"{self._path}.tmp", "w") as f:
+                dump(self._data, f)
+            replace(f"{self._path}.tmp", self._path)
+        except Exception as e:
+            LOGGER.error(f"Unable to save {self._path}: {e}")
+
+    def get(self, key):
+        with self._lock:
+            if entry := self._store().get(key):
+                return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store()[key] = [value, time()]
+            self._save()
+
+    def pop(self, key):
+        with self._lock:
+            if self._store().pop(key, None) is not None:
+                self._save()
+
+
+def _thread_attr(name, default=None):
+    def getter(self):
+        return getattr(self.__dict__.setdefault("_local", local()), name, default)
+
+    def setter(self, value):
+        setattr(self.__dict__.setdefault("_local", local()), name, value)
+
+    return property(getter, setter)
+
+
+class ThreadedService:
+    service = _thread_attr("service")
+    sa_index = _thread_attr("sa_index", 0)
+    sa_count = _thread_attr("sa_count", 1)
+
 
 class GoogleDriveHelper:
     def __init__(self):
@@ -69,12 +139,14 @@ class GoogleDriveHelper:
             self.proc_bytes += chunk_size
             self.total_time += self.update_interval
 
-    def authorize(self):
+    def authorize(self, sa_index=None):
         credentials = None
         if self.use_sa:
             json_files = listdir("accounts")
             self.sa_number = len(json_files)
-            self.sa_index = randrange(self.sa_number)
+            if sa_index is None or sa_index >= self.sa_number:
+                sa_index = randrange(self.sa_number)
+            self.sa_index = sa_index
             LOGGER.info(f"Authorizing with {json_files[self.sa_index]} service account")
             credentials = service_account.Credentials.from_service_account_file(
                 f"accounts/{json_files[self.sa_index]}", scopes=self._OAUTH_SCOPE
@@ -96,7 +168,7 @@ class GoogleDriveHelper:
             self.sa_index += 1
         self.sa_count += 1
         LOGGER.info(f"Switching to {self.sa_index} index")
-        self.service = self.authorize()
+        self.service = self.authorize(self.sa_index)
 
     def get_id_from_url(self, link, user_id=""):
         if user_id and link.startswith("mtp:"):
@@ -176,7 +248,7 @@ class GoogleDriveHelper:
                     includeItemsFromAllDrives=True,
                     q=q,
                     spaces="drive",
-                    pageSize=200,
+                    pageSize=1000,
                     fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
                     orderBy="folder, name",
                     pageToken=page_token,
@@ -189,6 +261,103 @@ class GoogleDriveHelper:
                 break
         return files
 
+    @retry(
+        wait=wait_exponential(multiplier=2, min=3, max=6),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(Exception),
+    )
+    def _list_children(self, service, parents):
+        page_token = None
+        files = []
+        q = " or ".join(f"'{parent}' in parents" for parent in parents)
+        while True:
+            response = (
+                service.files()
+                .list(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    q=f"({q}) and trashed = false",
+                    spaces="drive",
+                    pageSize=1000,
+                    fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails, parents)",
+                    orderBy="folder, name",
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            files.extend(response.get("files", []))
+            page_token = response.get("nextPageToken")
+            if page_token is None:
+                break
+        return files
+
+    def get_tree(self, folder_id, shortcuts=False, cached=False):
+        key = (folder_id, shortcuts, self.use_sa, self.token_path)
+        if cached:
+            with _trees_lock:
+                entry = _trees.get(key)
+            if entry and time() - entry[0] < TREE_TTL:
+                return entry[1], entry[2]
+        levels = []
+        files = []
+        seen = {folder_id}
+        parents = [folder_id]
+        services = local()
+
+        def list_batch(batch):
+            if (service := getattr(services, "service", None)) is None:
+                service = services.service = self.authorize()
+            return batch, self._list_children(service, batch)
+
+        with ThreadPoolExecutor(max_workers=LIST_WORKERS) as pool:
+            while parents:
+                level = []
+                batches = [
+                    parents[i : i + LIST_BATCH]
+                    for i in range(0, len(parents), LIST_BATCH)
+                ]
+                for batch, items in pool.map(list_batch, batches):
+                    for item in items:
+                        details = item.get("shortcutDetails")
+                        if (
+                            shortcuts
+                            and details
+                            and details["targetMimeType"] == self.G_DRIVE_DIR_MIME_TYPE
+                        ):
+                            item = {
+                                "id": details["targetId"],
+                                "name": item["name"],
+                                "mimeType": self.G_DRIVE_DIR_MIME_TYPE,
+                                "parents": item.get("parents", []),
+                            }
+                        for parent in item.get("parents", []):
+                            if parent not in batch:
+                                continue
+                            if item.get("mimeType") != self.G_DRIVE_DIR_MIME_TYPE:
+                                files.append((item, parent))
+                            elif item["id"] not in seen:
+                                seen.add(item["id"])
+                                level.append((item, parent))
+                if level:
+                    levels.append(level)
+                parents = [item["id"] for item, _ in level]
+        with _trees_lock:
+            if len(_trees) >= 50:
+                del _trees[next(iter(_trees))]
+            _trees[key] = (
+                time(),
+                levels,
+                files,
+                seen | {item["id"] for item, _ in files},
+            )
+        return levels, files
+
+    def invalidate_tree(self, item_id):
+        with _trees_lock:
+            for key, entry in list(_trees.items()):
+                if item_id in entry[3]:
+                    del _trees[key]
+
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
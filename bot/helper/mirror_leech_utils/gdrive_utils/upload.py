@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
+from json import loads
 from logging import getLogger
 from os import path as ospath, listdir, remove
+from threading import Lock
+from time import sleep
 from tenacity import (
     retry,
     wait_exponential,
@@ -13,20 +17,41 @@ from tenacity import (
 from ....core.config_manager import Config
 from ...ext_utils.bot_utils import async_to_sync, SetInterval
 from ...ext_utils.files_utils import get_mime_type
-from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from ...mirror_leech_utils.gdrive_utils.helper import (
+    GoogleDriveHelper,
+    DriveState,
+    ThreadedService,
+)
 
 LOGGER = getLogger(__name__)
 
+_sessions = DriveState("gdrive_sessions.json")
+
 
-class GoogleDriveUpload(GoogleDriveHelper):
+class GoogleDriveUpload(ThreadedService, GoogleDriveHelper):
     def __init__(self, listener, path):
         self.listener = listener
         self._updater = None
         self._path = path
         self._is_errored = False
+        self._lock = Lock()
+        self._inflight = {}
+        self._failed = False
+        self._dir_keys = []
         super().__init__()
         self.is_uploading = True
 
+    async def progress(self):
+        if not self._inflight:
+            return
+        with self._lock:
+            for entry in list(self._inflight.values()):
+                if (status := entry[0]) is not None:
+                    done = status.resumable_progress
+                    self.proc_bytes += done - entry[1]
+                    entry[1] = done
+            self.total_time += self.update_interval
+
     def user_setting(self):
         if self.listener.up_dest.startswith("mtp:"):
             self.token_path = f"tokens/{self.listener.user_id}.pickle"
@@ -61,10 +86,8 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 LOGGER.info(f"Uploaded To G-Drive: {self._path}")
             else:
                 mime_type = "Folder"
-                dir_id = self.create_directory(
-                    ospath.basename(ospath.abspath(self.listener.name)),
-                    self.listener.up_dest,
-                )
+                name = ospath.basename(ospath.abspath(self.listener.name))
+                dir_id = self._get_directory(name, self.listener.up_dest, name)
                 result = self._upload_dir(self._path, dir_id)
                 if result is None:
                     raise ValueError("Upload has been manually cancelled!")
@@ -78,10 +101,13 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 err = err.last_attempt.exception()
             err = str(err).replace(">", "").replace("<", "")
             LOGGER.error(err)
-            async_to_sync(self.listener.on_upload_error, err)
+            async_to_sync(self.listener.on_upload_error, err, wait=False)
             self._is_errored = True
         finally:
             self._updater.cancel()
+            if not self._is_errored:
+                for key in self._dir_keys:
+                    _sessions.pop(key)
             if self.listener.is_cancelled and not self._is_errored:
                 if mime_type == "Folder" and dir_id:
                     LOGGER.info("Deleting uploaded data from Drive...")
@@ -91,6 +117,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 return
             elif self._is_errored:
                 return
+            self.invalidate_tree(self.listener.up_dest)
             async_to_sync(
                 self.listener.on_upload_complete,
                 link,
@@ -98,29 +125,88 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 self.total_folders,
                 mime_type,
                 dir_id=self.get_id_from_url(link),
+                wait=False,
             )
             return
 
-    def _upload_dir(self, input_directory, dest_id):
-        list_dirs = listdir(input_directory)
-        if len(list_dirs) == 0:
-            return dest_id
-        new_id = None
-        for item in list_dirs:
+    def _create_tree(self, input_directory, dest_id, jobs):
+        for item in listdir(input_directory):
             current_file_name = ospath.join(input_directory, item)
             if ospath.isdir(current_file_name):
-                current_dir_id = self.create_directory(item, dest_id)
-                new_id = self._upload_dir(current_file_name, current_dir_id)
+                current_dir_id = self._get_directory(
+                    item, dest_id, self._relpath(current_file_name)
+                )
+                self._create_tree(current_file_name, current_dir_id, jobs)
                 self.total_folders += 1
             else:
-                mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
-                self._upload_file(current_file_name, file_name, mime_type, dest_id)
-                self.total_files += 1
-                new_id = dest_id
+                jobs.append((current_file_name, item, dest_id))
             if self.listener.is_cancelled:
                 break
-        return new_id
+
+    def _relpath(self, path):
+        return ospath.relpath(path, ospath.dirname(self._path))
+
+    def _get_directory(self, name, dest_id, rel_path):
+        key = f"dir:{self.listener.up_dest}/{rel_path}"
+        self._dir_keys.append(key)
+        if dir_id := _sessions.get(key):
+            try:
+                meta = (
+                    self.service.files()
+                    .get(fileId=dir_id, fields="trashed", supportsAllDrives=True)
+                    .execute()
+                )
+                if not meta.get("trashed"):
+                    LOGGER.info(f"Reusing G-Drive Folder: {name}")
+                    return dir_id
+            except HttpError:
+                pass
+        dir_id = self.create_directory(name, dest_id)
+        _sessions.set(key, dir_id)
+        return dir_id
+
+    def _resume_session(self, request, session, size):
+        resp, content = request.http.request(
+            session,
+            "PUT",
+            headers={"Content-Length": "0", "Content-Range": f"bytes */{size}"},
+        )
+        if resp.status in [200, 201]:
+            return loads(content)
+        if resp.status != 308:
+            raise HttpError(resp, content, uri=session)
+        request.resumable_uri = session
+        if byte_range := resp.get("range"):
+            request.resumable_progress = int(byte_range.rsplit("-", 1)[1]) + 1
+        return None
+
+    def _upload_job(self, file_path, file_name, dest_id):
+        if self.listener.is_cancelled or self._failed:
+            return
+        if self.service is None:
+            self.service = self.authorize()
+        try:
+            mime_type = get_mime_type(file_path)
+            self._upload_file(file_path, file_name, mime_type, dest_id)
+        except:
+            self._failed = True
+            raise
+        with self._lock:
+            self.total_files += 1
+
+    def _upload_dir(self, input_directory, dest_id):
+        jobs = []
+        self._create_tree(input_directory, dest_id, jobs)
+        if self.listener.is_cancelled:
+            return dest_id
+        with ThreadPoolExecutor(
+            max_workers=max(1, Config.GDRIVE_CONCURRENT_UPLOADS),
+            thread_name_prefix="gdup",
+        ) as pool:
+            futures = [pool.submit(self._upload_job, *job) for job in jobs]
+        for future in futures:
+            future.result()
+        return dest_id
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -161,14 +247,37 @@ class GoogleDriveUpload(GoogleDriveHelper):
         drive_file = self.service.files().create(
             body=file_metadata, media_body=media_body, supportsAllDrives=True
         )
+        key = f"{self.listener.up_dest}/{self._relpath(file_path)}/{media_body.size()}"
+        entry = self._inflight.setdefault(file_path, [None, 0])
         response = None
         retries = 0
+        if session := _sessions.get(key):
+            try:
+                response = self._resume_session(drive_file, session, media_body.size())
+                LOGGER.info(f"Resuming upload session: {file_name}")
+            except HttpError as err:
+                if err.resp.status not in [404, 410]:
+                    raise err
+                LOGGER.info(f"Upload session expired, restarting: {file_name}")
+                _sessions.pop(key)
+                session = None
         while response is None and not self.listener.is_cancelled:
             try:
-                self.status, response = drive_file.next_chunk()
+                entry[0], response = drive_file.next_chunk()
+                retries = 0
+                if drive_file.resumable_uri != session:
+                    session = drive_file.resumable_uri
+                    _sessions.set(key, session)
             except HttpError as err:
+                if err.resp.status in [404, 410] and session:
+                    LOGGER.info(f"Upload session expired, restarting: {file_name}")
+                    _sessions.pop(key)
+                    return self._upload_file(
+                        file_path, file_name, mime_type, dest_id, in_dir
+                    )
                 if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
                     retries += 1
+                    sleep(min(2**retries, 64))
                     continue
                 if err.resp.get("content-type", "").startswith("application/json"):
                     reason = (
@@ -202,11 +311,14 @@ class GoogleDriveUpload(GoogleDriveHelper):
                         raise err
         if self.listener.is_cancelled:
             return
+        _sessions.pop(key)
+        with self._lock:
+            self.proc_bytes += media_body.size() - entry[1]
+            self._inflight.pop(file_path, None)
         try:
             remove(file_path)
         except:
             pass
-        self.file_processed_bytes = 0
         if not Config.IS_TEAM_DRIVE:
             self.set_permission(response["id"])
         if not in_dir:
@@ -280,7 +280,7 @@ class RcloneTransferHelper:
             folders, files = await count_files_and_folders(path)
             rc_path += f"/{self._listener.name}" if rc_path else self._listener.name
         else:
-            mime_type = await sync_to_async(get_mime_type, path)
+            mime_type = await sync_to_async(get_mime_type, path, pool="fs")
             folders = 0
             files = 1
 
@@ -6,12 +6,15 @@ from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_time,
     get_readable_file_size,
+    index_task_gid,
 )
 
 
 async def get_download(gid, old_info=None):
+    if res := TorrentManager.aria2_state.get(gid):
+        return res
     try:
-        res = await TorrentManager.aria2.tellStatus(gid)
+        res = await TorrentManager.aria2_status(gid)
         return res or old_info
     except Exception as e:
         LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
@@ -27,11 +30,13 @@ class Aria2Status:
         self.start_time = 0
         self.seeding = seeding
         self.tool = "aria2"
+        index_task_gid(self, gid)
 
     async def update(self):
         self._download = await get_download(self._gid, self._download)
         if self._download.get("followedBy", []):
             self._gid = self._download["followedBy"][0]
+            index_task_gid(self, self._gid)
             self._download = await get_download(self._gid)
 
     def progress(self):
@@ -40,6 +45,9 @@ class Aria2Status:
         except:
             return "0%"
 
+    def processed_raw(self):
+        return int(self._download.get("completedLength", "0"))
+
     def processed_bytes(self):
         return get_readable_file_size(int(self._download.get("completedLength", "0")))
 
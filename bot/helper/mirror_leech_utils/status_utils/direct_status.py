@@ -2,6 +2,7 @@ from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -11,6 +12,7 @@ class DirectStatus:
         self._obj = obj
         self.listener = listener
         self.tool = "aria2"
+        index_task_gid(self, gid)
 
     def gid(self):
         return self._gid
@@ -48,6 +50,9 @@ class DirectStatus:
             return MirrorStatus.STATUS_QUEUEDL
         return MirrorStatus.STATUS_DOWNLOAD
 
+    def processed_raw(self):
+        return self._obj.processed_bytes
+
     def processed_bytes(self):
         return get_readable_file_size(self._obj.processed_bytes)
 
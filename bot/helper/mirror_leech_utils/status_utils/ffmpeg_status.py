@@ -3,6 +3,7 @@ from ...ext_utils.status_utils import (
     get_readable_file_size,
     MirrorStatus,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -13,6 +14,7 @@ class FFmpegStatus:
         self._gid = gid
         self._cstatus = status
         self.tool = "ffmpeg"
+        index_task_gid(self, gid)
 
     def speed(self):
         return f"{get_readable_file_size(self._obj.speed_raw)}/s"
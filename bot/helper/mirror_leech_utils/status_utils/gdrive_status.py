@@ -2,6 +2,7 @@ from ....helper.ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -13,6 +14,10 @@ class GoogleDriveStatus:
         self._gid = gid
         self._status = status
         self.tool = "gDriveApi"
+        index_task_gid(self, gid)
+
+    def processed_raw(self):
+        return self._obj.processed_bytes
 
     def processed_bytes(self):
         return get_readable_file_size(self._obj.processed_bytes)
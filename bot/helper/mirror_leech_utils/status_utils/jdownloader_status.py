@@ -6,6 +6,7 @@ from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -73,6 +74,7 @@ class JDownloaderStatus:
         self._gid = gid
         self._info = {}
         self.tool = "jdownloader"
+        index_task_gid(self, gid)
 
     async def _update(self):
         self._info = await get_download(self._gid, self._info)
@@ -83,6 +85,9 @@ class JDownloaderStatus:
         except:
             return "0%"
 
+    def processed_raw(self):
+        return self._info.get("bytesLoaded", 0)
+
     def processed_bytes(self):
         return get_readable_file_size(self._info.get("bytesLoaded", 0))
 
@@ -6,6 +6,7 @@ from ...ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
     time_to_seconds,
+    index_task_gid,
 )
 
 
@@ -61,6 +62,7 @@ class SabnzbdStatus:
         self._gid = gid
         self._info = None
         self.tool = "sabnzbd"
+        index_task_gid(self, gid)
 
     async def update(self):
         self._info = await get_download(self._gid, self._info)
@@ -6,10 +6,13 @@ from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    index_task_gid,
 )
 
 
-async def get_download(tag, old_info=None):
+async def get_download(tag, hash_, old_info=None):
+    if res := TorrentManager.qb_state.get(hash_):
+        return res
     try:
         res = (await TorrentManager.qbittorrent.torrents.info(tag=tag))[0]
         return res or old_info
@@ -19,19 +22,25 @@ async def get_download(tag, old_info=None):
 
 
 class QbittorrentStatus:
-    def __init__(self, listener, seeding=False, queued=False):
+    def __init__(self, listener, info, seeding=False, queued=False):
         self.queued = queued
         self.seeding = seeding
         self.listener = listener
-        self._info = None
+        self._info = info
         self.tool = "qbittorrent"
+        index_task_gid(self, info.hash[:12])
 
     async def update(self):
-        self._info = await get_download(f"{self.listener.mid}", self._info)
+        self._info = await get_download(
+            f"{self.listener.mid}", self._info.hash, self._info
+        )
 
     def progress(self):
         return f"{round(self._info.progress * 100, 2)}%"
 
+    def processed_raw(self):
+        return self._info.downloaded
+
     def processed_bytes(self):
         return get_readable_file_size(self._info.downloaded)
 
@@ -1,5 +1,9 @@
 from .... import LOGGER
-from ...ext_utils.status_utils import get_readable_file_size, MirrorStatus
+from ...ext_utils.status_utils import (
+    get_readable_file_size,
+    MirrorStatus,
+    index_task_gid,
+)
 
 
 class QueueStatus:
@@ -9,6 +13,7 @@ class QueueStatus:
         self._gid = gid
         self._status = status
         self.tool = "system"
+        index_task_gid(self, gid)
 
     def gid(self):
         return self._gid
@@ -1,4 +1,4 @@
-from ...ext_utils.status_utils import MirrorStatus
+from ...ext_utils.status_utils import MirrorStatus, index_task_gid
 
 
 class RcloneStatus:
@@ -8,6 +8,7 @@ class RcloneStatus:
         self._status = status
         self.listener = listener
         self.tool = "rclone"
+        index_task_gid(self, gid)
 
     def gid(self):
         return self._gid
@@ -5,6 +5,7 @@ from ...ext_utils.status_utils import (
     get_readable_file_size,
     MirrorStatus,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -16,6 +17,7 @@ class SevenZStatus:
         self._start_time = time()
         self._cstatus = status
         self.tool = "7z"
+        index_task_gid(self, gid)
 
     def gid(self):
         return self._gid
@@ -59,12 +61,5 @@ class SevenZStatus:
     async def cancel_task(self):
         LOGGER.info(f"Cancelling {self._cstatus}: {self.listener.name}")
         self.listener.is_cancelled = True
-        if (
-            self.listener.subproc is not None
-            and self.listener.subproc.returncode is None
-        ):
-            try:
-                self.listener.subproc.kill()
-            except:
-                pass
+        self._obj.kill()
         await self.listener.on_upload_error(f"{self._cstatus} stopped by user!")
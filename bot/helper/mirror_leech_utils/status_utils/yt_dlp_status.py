@@ -2,6 +2,7 @@ from ...ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    index_task_gid,
 )
 
 
@@ -11,10 +12,14 @@ class YtDlpStatus:
         self._gid = gid
         self.listener = listener
         self.tool = "yt-dlp"
+        index_task_gid(self, gid)
 
     def gid(self):
         return self._gid
 
+    def processed_raw(self):
+        return self._obj.downloaded_bytes
+
     def processed_bytes(self):
         return get_readable_file_size(self._obj.downloaded_bytes)
 
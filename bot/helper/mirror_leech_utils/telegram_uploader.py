@@ -1,9 +1,9 @@
-from PIL import Image
 from aioshutil import rmtree
-from asyncio import sleep
+from asyncio import sleep, gather, Lock, Semaphore
+from contextlib import nullcontext
 from logging import getLogger
 from natsort import natsorted
-from os import walk, path as ospath
+from os import path as ospath
 from time import time
 from re import match as re_match, sub as re_sub
 from pyrogram.errors import FloodWait, RPCError, FloodPremiumWait, BadRequest
@@ -25,10 +25,15 @@ from tenacity import (
     RetryError,
 )
 
+from ... import bot_loop
 from ...core.config_manager import Config
 from ...core.mltb_client import TgClient
-from ..ext_utils.bot_utils import sync_to_async
-from ..ext_utils.files_utils import is_archive, get_base_name
+from ..ext_utils.files_utils import (
+    is_archive,
+    get_base_name,
+    get_manifest,
+    FileRange,
+)
 from ..telegram_helper.message_utils import delete_message
 from ..ext_utils.media_utils import (
     get_media_info,
@@ -36,6 +41,9 @@ from ..ext_utils.media_utils import (
     get_video_thumbnail,
     get_audio_thumbnail,
     get_multiple_frames_thumbnail,
+    get_image_size,
+    get_fingerprint,
+    drop_thumbnails,
 )
 
 LOGGER = getLogger(__name__)
@@ -43,7 +51,7 @@ LOGGER = getLogger(__name__)
 
 class TelegramUploader:
     def __init__(self, listener, path):
-        self._last_uploaded = 0
+        self._last_uploaded = {}
         self._processed_bytes = 0
         self._listener = listener
         self._path = path
@@ -55,24 +63,35 @@ class TelegramUploader:
         self._is_corrupted = False
         self._media_dict = {"videos": {}, "documents": {}}
         self._last_msg_in_group = False
-        self._up_path = ""
         self._lprefix = ""
         self._media_group = False
         self._is_private = False
         self._sent_msg = None
         self._user_session = self._listener.user_transmission
         self._error = ""
+        self._streamed = set()
+        self._prefetch_tasks = set()
+        self._prefetched = set()
+        self._workers = max(Config.LEECH_CONCURRENT_UPLOADS, 1)
+        self._slots = Semaphore(self._workers)
+        self._inflight = {True: 0, False: 0}
+        self._flood_until = 0
+        self._group_lock = Lock()
 
-    async def _upload_progress(self, current, _):
+    async def _upload_progress(self, current, _, up_path):
         if self._listener.is_cancelled:
             if self._user_session:
                 TgClient.user.stop_transmission()
             else:
                 self._listener.client.stop_transmission()
-        chunk_size = current - self._last_uploaded
-        self._last_uploaded = current
+        chunk_size = current - self._last_uploaded.get(up_path, 0)
+        self._last_uploaded[up_path] = current
         self._processed_bytes += chunk_size
 
+    async def _wait_flood(self):
+        while (delay := self._flood_until - time()) > 0:
+            await sleep(delay)
+
     async def _user_settings(self):
         self._media_group = self._listener.user_dict.get("MEDIA_GROUP") or (
             Config.MEDIA_GROUP
@@ -130,13 +149,12 @@ class TelegramUploader:
             self._sent_msg = self._listener.message
         return True
 
-    async def _prepare_file(self, file_, dirpath):
+    def _get_name(self, file_):
+        name = file_
         if self._lprefix:
             cap_mono = f"{self._lprefix} <code>{file_}</code>"
             self._lprefix = re_sub("<.*?>", "", self._lprefix)
-            new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
+            name = f"{self._lprefix} {file_}"
         else:
             cap_mono = f"<code>{file_}</code>"
         if len(file_) > 60:
@@ -154,11 +172,16 @@ class TelegramUploader:
                 ext = ""
             extn = len(ext)
             remain = 60 - extn
-            name = name[:remain]
-            new_path = ospath.join(dirpath, f"{name}{ext}")
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
-        return cap_mono
+            name = f"{name[:remain]}{ext}"
+        return cap_mono, name
+
+    async def _prepare_file(self, file_, dirpath, up_path):
+        cap_mono, name = self._get_name(file_)
+        if name != file_:
+            new_path = ospath.join(dirpath, name)
+            await rename(up_path, new_path)
+            up_path = new_path
+        return cap_mono, up_path
 
     def _get_input_media(self, subkey, key):
         rlist = []
@@ -190,6 +213,7 @@ class TelegramUploader:
             )[-1]
 
     async def _send_media_group(self, subkey, key, msgs):
+        msgs.sort(key=lambda x: x[2])
         for index, msg in enumerate(msgs):
             if self._listener.hybrid_leech or not self._user_session:
                 msgs[index] = await self._listener.client.get_messages(
@@ -214,85 +238,199 @@ class TelegramUploader:
                 self._msgs_dict[m.link] = m.caption
         self._sent_msg = msgs_list[-1]
 
-    async def upload(self):
+    async def prepare(self):
+        if self._sent_msg is not None:
+            return True
         await self._user_settings()
-        res = await self._msg_to_reply()
-        if not res:
+        return await self._msg_to_reply()
+
+    def mark_streamed(self, f_path):
+        self._streamed.add(f_path)
+        self._listener.virtual_splits.pop(f_path, None)
+
+    def is_streamed(self, f_path):
+        if f_path in self._streamed:
+            return True
+        base, ext = ospath.splitext(f_path)
+        return ext[1:].isdigit() and base in self._streamed
+
+    async def _reply_target(self, f_size):
+        if not (self._listener.hybrid_leech and self._listener.user_transmission):
+            return self._user_session, self._sent_msg
+        user_session = f_size > 2097152000 or (
+            self._workers > 1 and self._inflight[True] < self._inflight[False]
+        )
+        self._user_session = user_session
+        client = TgClient.user if user_session else self._listener.client
+        return user_session, await client.get_messages(
+            chat_id=self._sent_msg.chat.id,
+            message_ids=self._sent_msg.id,
+        )
+
+    async def _prefetch_thumb(self, f_path):
+        if self._thumb is not None or self._listener.is_cancelled:
+            return
+        file_name = ospath.splitext(ospath.basename(f_path))[0]
+        if await aiopath.isfile(f"{self._path}/yt-dlp-thumb/{file_name}.jpg"):
             return
-        for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
+        if (fingerprint := await get_fingerprint(f_path)) is not None:
+            self._prefetched.add(fingerprint)
+        try:
+            is_video, is_audio, is_image = await get_document_type(f_path)
+            if is_image:
+                return
+            if is_audio and not is_video:
+                await get_audio_thumbnail(f_path)
+            elif is_video:
+                if self._listener.thumbnail_layout and not self._listener.as_doc:
+                    if not self._listener.screen_shots:
+                        await get_multiple_frames_thumbnail(
+                            f_path, self._listener.thumbnail_layout, False
+                        )
+                else:
+                    await get_video_thumbnail(f_path, None)
+        except Exception as e:
+            LOGGER.error(f"Thumbnail prefetch: {e}. Path: {f_path}")
+
+    async def upload_file(self, dirpath, file_):
+        self._error = ""
+        up_path = f_path = ospath.join(dirpath, file_)
+        if not await aiopath.exists(up_path):
+            LOGGER.error(f"{up_path} not exists! Continue uploading!")
+            return True
+        fingerprint = await get_fingerprint(up_path)
+        try:
+            f_size = await aiopath.getsize(up_path)
+            if split_size := self._listener.virtual_splits.get(f_path):
+                parts = [
+                    (f"{file_}.{index:03}", offset, min(split_size, f_size - offset))
+                    for index, offset in enumerate(range(0, f_size, split_size), 1)
+                ]
+            else:
+                parts = [(file_, 0, f_size)]
+            self._total_files += len(parts)
+            if f_size == 0:
+                LOGGER.error(
+                    f"{up_path} size is zero, telegram don't upload zero size files"
+                )
+                self._corrupted += 1
+                return True
+            if self._listener.is_cancelled:
+                return False
+            if not split_size:
+                cap_mono, up_path = await self._prepare_file(file_, dirpath, up_path)
+            if self._last_msg_in_group and self._workers == 1:
+                group_lists = [x for v in self._media_dict.values() for x in v.keys()]
+                match = re_match(r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)", f_path)
+                if not match or match and match.group(0) not in group_lists:
+                    for key, value in list(self._media_dict.items()):
+                        for subkey, msgs in list(value.items()):
+                            if len(msgs) > 1:
+                                await self._send_media_group(subkey, key, msgs)
+            user_session, reply_to = await self._reply_target(parts[0][2])
+            for part_name, offset, length in parts:
+                if split_size:
+                    cap_mono, name = self._get_name(part_name)
+                    part = (offset, length, name)
+                    o_path = ospath.join(dirpath, part_name)
+                else:
+                    part = None
+                    o_path = f_path
+                self._last_msg_in_group = False
+                self._last_uploaded[up_path] = 0
+                self._inflight[user_session] += 1
+                try:
+                    sent_msg = await self._upload_file(
+                        reply_to, up_path, cap_mono, part_name, o_path, part=part
+                    )
+                finally:
+                    self._inflight[user_session] -= 1
+                    self._last_uploaded.pop(up_path, None)
+                if self._listener.is_cancelled:
+                    return False
+                if (
+                    sent_msg
+                    and not self._is_corrupted
+                    and (self._listener.is_super_chat or self._listener.up_dest)
+                    and not self._is_private
+                ):
+                    self._msgs_dict[sent_msg.link] = part_name
+                reply_to = sent_msg or reply_to
+                await sleep(1)
+        except Exception as err:
+            if isinstance(err, RetryError):
+                LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+                err = err.last_attempt.exception()
+            LOGGER.error(f"{err}. Path: {up_path}")
+            self._error = str(err)
+            self._corrupted += 1
+            if self._listener.is_cancelled:
+                return False
+        await drop_thumbnails(fingerprint)
+        if not self._listener.is_cancelled and await aiopath.exists(up_path):
+            await remove(up_path)
+        return True
+
+    async def _upload_worker(self, dirpath, file_):
+        try:
+            await self.upload_file(dirpath, file_)
+        finally:
+            self._slots.release()
+
+    def _start_prefetch(self, f_path):
+        task = bot_loop.create_task(self._prefetch_thumb(f_path))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _clear_prefetch(self):
+        tasks = list(self._prefetch_tasks)
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+        for fingerprint in self._prefetched:
+            await drop_thumbnails(fingerprint)
+        self._prefetched.clear()
+
+    async def upload(self):
+        try:
+            await self._upload()
+        finally:
+            await self._clear_prefetch()
+
+    async def _upload(self):
+        if not await self.prepare():
+            return
+        tasks = []
+        prefetched = set()
+        for dirpath, _, files in natsorted((await get_manifest(self._path)).walk()):
+            if self._listener.is_cancelled:
+                break
             if dirpath.strip().endswith("/yt-dlp-thumb"):
                 continue
             if dirpath.strip().endswith("_mltbss"):
                 await self._send_screenshots(dirpath, files)
                 await rmtree(dirpath, ignore_errors=True)
                 continue
+            pending = []
             for file_ in natsorted(files):
-                self._error = ""
-                self._up_path = f_path = ospath.join(dirpath, file_)
-                if not await aiopath.exists(self._up_path):
-                    LOGGER.error(f"{self._up_path} not exists! Continue uploading!")
-                    continue
-                try:
-                    f_size = await aiopath.getsize(self._up_path)
-                    self._total_files += 1
-                    if f_size == 0:
-                        LOGGER.error(
-                            f"{self._up_path} size is zero, telegram don't upload zero size files"
-                        )
-                        self._corrupted += 1
-                        continue
-                    if self._listener.is_cancelled:
-                        return
-                    cap_mono = await self._prepare_file(file_, dirpath)
-                    if self._last_msg_in_group:
-                        group_lists = [
-                            x for v in self._media_dict.values() for x in v.keys()
-                        ]
-                        match = re_match(r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)", f_path)
-                        if not match or match and match.group(0) not in group_lists:
-                            for key, value in list(self._media_dict.items()):
-                                for subkey, msgs in list(value.items()):
-                                    if len(msgs) > 1:
-                                        await self._send_media_group(subkey, key, msgs)
-                    if self._listener.hybrid_leech and self._listener.user_transmission:
-                        self._user_session = f_size > 2097152000
-                        if self._user_session:
-                            self._sent_msg = await TgClient.user.get_messages(
-                                chat_id=self._sent_msg.chat.id,
-                                message_ids=self._sent_msg.id,
-                            )
-                        else:
-                            self._sent_msg = await self._listener.client.get_messages(
-                                chat_id=self._sent_msg.chat.id,
-                                message_ids=self._sent_msg.id,
-                            )
-                    self._last_msg_in_group = False
-                    self._last_uploaded = 0
-                    await self._upload_file(cap_mono, file_, f_path)
-                    if self._listener.is_cancelled:
-                        return
-                    if (
-                        not self._is_corrupted
-                        and (self._listener.is_super_chat or self._listener.up_dest)
-                        and not self._is_private
-                    ):
-                        self._msgs_dict[self._sent_msg.link] = file_
-                    await sleep(1)
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(
-                            f"Total Attempts: {err.last_attempt.attempt_number}"
-                        )
-                        err = err.last_attempt.exception()
-                    LOGGER.error(f"{err}. Path: {self._up_path}")
-                    self._error = str(err)
-                    self._corrupted += 1
-                    if self._listener.is_cancelled:
-                        return
-                if not self._listener.is_cancelled and await aiopath.exists(
-                    self._up_path
-                ):
-                    await remove(self._up_path)
+                f_path = ospath.join(dirpath, file_)
+                if self.is_streamed(f_path):
+                    await remove(f_path)
+                else:
+                    pending.append(file_)
+            for index, file_ in enumerate(pending):
+                for next_file in pending[index + 1 : index + self._workers + 1]:
+                    if (next_path := ospath.join(dirpath, next_file)) not in prefetched:
+                        prefetched.add(next_path)
+                        self._start_prefetch(next_path)
+                await self._slots.acquire()
+                if self._listener.is_cancelled:
+                    self._slots.release()
+                    break
+                tasks.append(bot_loop.create_task(self._upload_worker(dirpath, file_)))
+        await gather(*tasks)
+        if self._listener.is_cancelled:
+            return
         for key, value in list(self._media_dict.items()):
             for subkey, msgs in list(value.items()):
                 if len(msgs) > 1:
@@ -315,6 +453,10 @@ class TelegramUploader:
             )
             return
         LOGGER.info(f"Leech Completed: {self._listener.name}")
+        if self._workers > 1:
+            self._msgs_dict = dict(
+                natsorted(self._msgs_dict.items(), key=lambda x: x[1])
+            )
         await self._listener.on_upload_complete(
             None, self._msgs_dict, self._total_files, self._corrupted
         )
@@ -325,7 +467,9 @@ class TelegramUploader:
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    async def _upload_file(self, cap_mono, file, o_path, force_document=False):
+    async def _upload_file(
+        self, reply_to, up_path, cap_mono, file, o_path, force_document=False, part=None
+    ):
         if (
             self._thumb is not None
             and not await aiopath.exists(self._thumb)
@@ -335,7 +479,7 @@ class TelegramUploader:
         thumb = self._thumb
         self._is_corrupted = False
         try:
-            is_video, is_audio, is_image = await get_document_type(self._up_path)
+            is_video, is_audio, is_image = await get_document_type(up_path)
 
             if not is_image and thumb is None:
                 file_name = ospath.splitext(file)[0]
@@ -343,44 +487,49 @@ class TelegramUploader:
                 if await aiopath.isfile(thumb_path):
                     thumb = thumb_path
                 elif is_audio and not is_video:
-                    thumb = await get_audio_thumbnail(self._up_path)
+                    thumb = await get_audio_thumbnail(up_path)
 
             if (
                 self._listener.as_doc
                 or force_document
+                or part
                 or (not is_video and not is_audio and not is_image)
             ):
                 key = "documents"
                 if is_video and thumb is None:
-                    thumb = await get_video_thumbnail(self._up_path, None)
+                    thumb = await get_video_thumbnail(up_path, None)
 
                 if self._listener.is_cancelled:
                     return
                 if thumb == "none":
                     thumb = None
-                self._sent_msg = await self._sent_msg.reply_document(
-                    document=self._up_path,
-                    quote=True,
-                    thumb=thumb,
-                    caption=cap_mono,
-                    force_document=True,
-                    disable_notification=True,
-                    progress=self._upload_progress,
-                )
+                await self._wait_flood()
+                with FileRange(up_path, *part) if part else nullcontext(
+                    up_path
+                ) as document:
+                    sent_msg = await reply_to.reply_document(
+                        document=document,
+                        quote=True,
+                        thumb=thumb,
+                        caption=cap_mono,
+                        force_document=True,
+                        disable_notification=True,
+                        progress=self._upload_progress,
+                        progress_args=(up_path,),
+                    )
             elif is_video:
                 key = "videos"
-                duration = (await get_media_info(self._up_path))[0]
+                duration = (await get_media_info(up_path))[0]
                 if thumb is None and self._listener.thumbnail_layout:
                     thumb = await get_multiple_frames_thumbnail(
-                        self._up_path,
+                        up_path,
                         self._listener.thumbnail_layout,
                         self._listener.screen_shots,
                     )
                 if thumb is None:
-                    thumb = await get_video_thumbnail(self._up_path, duration)
+                    thumb = await get_video_thumbnail(up_path, duration)
                 if thumb is not None and thumb != "none":
-                    with Image.open(thumb) as img:
-                        width, height = img.size
+                    width, height = await get_image_size(thumb)
                 else:
                     width = 480
                     height = 320
@@ -388,8 +537,9 @@ class TelegramUploader:
                     return
                 if thumb == "none":
                     thumb = None
-                self._sent_msg = await self._sent_msg.reply_video(
-                    video=self._up_path,
+                await self._wait_flood()
+                sent_msg = await reply_to.reply_video(
+                    video=up_path,
                     quote=True,
                     caption=cap_mono,
                     duration=duration,
@@ -399,16 +549,18 @@ class TelegramUploader:
                     supports_streaming=True,
                     disable_notification=True,
                     progress=self._upload_progress,
+                    progress_args=(up_path,),
                 )
             elif is_audio:
                 key = "audios"
-                duration, artist, title = await get_media_info(self._up_path)
+                duration, artist, title = await get_media_info(up_path)
                 if self._listener.is_cancelled:
                     return
                 if thumb == "none":
                     thumb = None
-                self._sent_msg = await self._sent_msg.reply_audio(
-                    audio=self._up_path,
+                await self._wait_flood()
+                sent_msg = await reply_to.reply_audio(
+                    audio=up_path,
                     quote=True,
                     caption=cap_mono,
                     duration=duration,
@@ -417,69 +569,61 @@ class TelegramUploader:
                     thumb=thumb,
                     disable_notification=True,
                     progress=self._upload_progress,
+                    progress_args=(up_path,),
                 )
             else:
                 key = "photos"
                 if self._listener.is_cancelled:
                     return
-                self._sent_msg = await self._sent_msg.reply_photo(
-                    photo=self._up_path,
+                await self._wait_flood()
+                sent_msg = await reply_to.reply_photo(
+                    photo=up_path,
                     quote=True,
                     caption=cap_mono,
                     disable_notification=True,
                     progress=self._upload_progress,
+                    progress_args=(up_path,),
                 )
+            self._sent_msg = sent_msg
 
             if (
                 not self._listener.is_cancelled
                 and self._media_group
-                and (self._sent_msg.video or self._sent_msg.document)
+                and (sent_msg.video or sent_msg.document)
             ):
-                key = "documents" if self._sent_msg.document else "videos"
+                key = "documents" if sent_msg.document else "videos"
                 if match := re_match(r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+$)", o_path):
                     pname = match.group(0)
-                    if pname in self._media_dict[key].keys():
-                        self._media_dict[key][pname].append(
-                            [self._sent_msg.chat.id, self._sent_msg.id]
-                        )
-                    else:
-                        self._media_dict[key][pname] = [
-                            [self._sent_msg.chat.id, self._sent_msg.id]
-                        ]
-                    msgs = self._media_dict[key][pname]
-                    if len(msgs) == 10:
-                        await self._send_media_group(pname, key, msgs)
-                    else:
-                        self._last_msg_in_group = True
+                    async with self._group_lock:
+                        if pname in self._media_dict[key].keys():
+                            self._media_dict[key][pname].append(
+                                [sent_msg.chat.id, sent_msg.id, o_path]
+                            )
+                        else:
+                            self._media_dict[key][pname] = [
+                                [sent_msg.chat.id, sent_msg.id, o_path]
+                            ]
+                        msgs = self._media_dict[key][pname]
+                        if len(msgs) == 10:
+                            await self._send_media_group(pname, key, msgs)
+                        else:
+                            self._last_msg_in_group = True
 
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
+            return sent_msg
         except (FloodWait, FloodPremiumWait) as f:
             LOGGER.warning(str(f))
-            await sleep(f.value * 1.3)
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
-            return await self._upload_file(cap_mono, file, o_path)
+            self._flood_until = max(self._flood_until, time() + f.value * 1.3)
+            return await self._upload_file(
+                reply_to, up_path, cap_mono, file, o_path, force_document, part
+            )
         except Exception as err:
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
             err_type = "RPCError: " if isinstance(err, RPCError) else ""
-            LOGGER.error(f"{err_type}{err}. Path: {self._up_path}")
+            LOGGER.error(f"{err_type}{err}. Path: {up_path}")
             if isinstance(err, BadRequest) and key != "documents":
-                LOGGER.error(f"Retrying As Document. Path: {self._up_path}")
-                return await self._upload_file(cap_mono, file, o_path, True)
+                LOGGER.error(f"Retrying As Document. Path: {up_path}")
+                return await self._upload_file(
+                    reply_to, up_path, cap_mono, file, o_path, True, part
+                )
             raise err
 
     @property
@@ -8,7 +8,11 @@ from ...core.config_manager import Config
 from ...core.mltb_client import TgClient
 from ..ext_utils.bot_utils import SetInterval
 from ..ext_utils.exceptions import TgLinkException
-from ..ext_utils.status_utils import get_readable_message
+from ..ext_utils.status_utils import (
+    get_readable_message,
+    refresh_task_snapshot,
+    start_task_collector,
+)
 
 
 async def send_message(message, text, buttons=None, block=True):
@@ -76,7 +80,7 @@ async def send_rss(text, chat_id, thread_id):
     except (FloodWait, FloodPremiumWait) as f:
         LOGGER.warning(str(f))
         await sleep(f.value * 1.2)
-        return await send_rss(text)
+        return await send_rss(text, chat_id, thread_id)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -183,6 +187,8 @@ async def temp_download(msg):
 async def update_status_message(sid, force=False):
     if intervals["stopAll"]:
         return
+    if force:
+        await refresh_task_snapshot()
     async with task_dict_lock:
         if not status_dict.get(sid):
             if obj := intervals["status"].get(sid):
@@ -196,32 +202,37 @@ async def update_status_message(sid, force=False):
         status = status_dict[sid]["status"]
         is_user = status_dict[sid]["is_user"]
         page_step = status_dict[sid]["page_step"]
-        text, buttons = await get_readable_message(
-            sid, is_user, page_no, status, page_step
-        )
-        if text is None:
-            del status_dict[sid]
-            if obj := intervals["status"].get(sid):
-                obj.cancel()
-                del intervals["status"][sid]
+        sent = status_dict[sid]["message"]
+    text, buttons = await get_readable_message(
+        sid, is_user, page_no, status, page_step
+    )
+    if text is None:
+        async with task_dict_lock:
+            if status_dict.get(sid, {}).get("message") is sent:
+                del status_dict[sid]
+                if obj := intervals["status"].get(sid):
+                    obj.cancel()
+                    del intervals["status"][sid]
+        return
+    if text == sent.text:
+        return
+    message = await edit_message(sent, text, buttons, block=False)
+    async with task_dict_lock:
+        if status_dict.get(sid, {}).get("message") is not sent:
             return
-        if text != status_dict[sid]["message"].text:
-            message = await edit_message(
-                status_dict[sid]["message"], text, buttons, block=False
-            )
-            if isinstance(message, str):
-                if message.startswith("Telegram says: [40"):
-                    del status_dict[sid]
-                    if obj := intervals["status"].get(sid):
-                        obj.cancel()
-                        del intervals["status"][sid]
-                else:
-                    LOGGER.error(
-                        f"Status with id: {sid} haven't been updated. Error: {message}"
-                    )
-                return
-            status_dict[sid]["message"].text = text
-            status_dict[sid]["time"] = time()
+        if isinstance(message, str):
+            if message.startswith("Telegram says: [40"):
+                del status_dict[sid]
+                if obj := intervals["status"].get(sid):
+                    obj.cancel()
+                    del intervals["status"][sid]
+            else:
+                LOGGER.error(
+                    f"Status with id: {sid} haven't been updated. Error: {message}"
+                )
+            return
+        sent.text = text
+        status_dict[sid]["time"] = time()
 
 
 async def send_status_message(msg, user_id=0):
@@ -276,3 +287,4 @@ async def send_status_message(msg, user_id=0):
             intervals["status"][sid] = SetInterval(
                 Config.STATUS_UPDATE_INTERVAL, update_status_message, sid
             )
+    await start_task_collector()
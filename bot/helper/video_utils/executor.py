@@ -2,7 +2,6 @@ from __future__ import annotations
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath, makedirs
 from aioshutil import rmtree
-from ast import literal_eval
 from asyncio import create_subprocess_exec, gather, Event, wait_for
 from asyncio.subprocess import PIPE
 import re
@@ -10,22 +9,20 @@ from natsort import natsorted
 from os import path as ospath, walk
 from time import time
 
-from bot import task_dict, task_dict_lock, LOGGER, VID_MODE, FFMPEG_NAME
+from bot import task_dict, task_dict_lock, cpu_eater_lock, LOGGER, VID_MODE, FFMPEG_NAME
 from bot.helper.ext_utils.bot_utils import sync_to_async, cmd_exec, new_task
 from bot.helper.ext_utils.files_utils import get_path_size, clean_target
-from bot.helper.ext_utils.media_utils import get_document_type, FFProgress
+from bot.helper.ext_utils.media_utils import get_document_type, get_media_streams, FFProgress
 from bot.helper.listeners import task_listener as task
 from bot.helper.mirror_leech_utils.status_utils.ffmpeg_status import FFmpegStatus
 from bot.helper.telegram_helper.message_utils import send_message, edit_message
 
 async def get_metavideo(video_file):
     try:
-        stdout, stderr, rcode = await cmd_exec(['ffprobe', '-hide_banner', '-print_format', 'json', '-show_streams', video_file])
-        if rcode != 0:
-            LOGGER.error(f"ffprobe error for {video_file}: {stderr}")
+        streams = [dict(stream) for stream in await get_media_streams(video_file)]
+        if not streams:
+            LOGGER.error(f"ffprobe error for {video_file}")
             return []
-        metadata = literal_eval(stdout)
-        streams = metadata.get('streams', [])
         for stream in streams:
             if stream.get('codec_type') == 'video':
                 stream['bit_rate'] = stream.get('bit_rate')
@@ -79,7 +76,8 @@ class VidEcxecutor(FFProgress):
             await self._send_status("Extracting...")
             await makedirs(extract_dir, exist_ok=True)
             cmd = ['7z', 'x', zip_path, f'-o{extract_dir}', '-y']
-            _, stderr, rcode = await cmd_exec(cmd)
+            async with cpu_eater_lock:
+                _, stderr, rcode = await cmd_exec(cmd)
             if rcode != 0:
                 LOGGER.error(f"Failed to extract ZIP: {stderr}")
                 await rmtree(extract_dir, ignore_errors=True)
@@ -100,7 +98,7 @@ class VidEcxecutor(FFProgress):
                 extract_dir = await self._extract_zip(self.path)
                 if extract_dir:
                     self._files.append(extract_dir)
-                    for dirpath, _, files in await sync_to_async(walk, extract_dir):
+                    for dirpath, _, files in await sync_to_async(walk, extract_dir, pool='fs'):
                         for file in natsorted(files):
                             file_path = ospath.join(dirpath, file)
                             if (await get_document_type(file_path))[0]:
@@ -109,7 +107,7 @@ class VidEcxecutor(FFProgress):
             elif (await get_document_type(self.path))[0]:
                 file_list.append(self.path)
         else:
-            for dirpath, _, files in await sync_to_async(walk, self.path):
+            for dirpath, _, files in await sync_to_async(walk, self.path, pool='fs'):
                 for file in natsorted(files):
                     file_path = ospath.join(dirpath, file)
                     if (await get_document_type(file_path))[0]:
@@ -291,15 +289,16 @@ class VidEcxecutor(FFProgress):
         try:
             await self._send_status(status)
             LOGGER.info(f"Running FFmpeg cmd: {' '.join(cmd)}")
-            process = await create_subprocess_exec(*cmd, stderr=PIPE)
-            self.listener.suproc = process
-            try:
-                _, code = await wait_for(gather(self.progress(status), process.wait()), timeout=7200)
-            except TimeoutError:
-                LOGGER.error("FFmpeg process timed out.")
-                process.kill()
-                self.is_cancelled = True
-                return False
+            async with cpu_eater_lock:
+                process = await create_subprocess_exec(*cmd, stderr=PIPE)
+                self.listener.suproc = process
+                try:
+                    _, code = await wait_for(gather(self.progress(status), process.wait()), timeout=7200)
+                except TimeoutError:
+                    LOGGER.error("FFmpeg process timed out.")
+                    process.kill()
+                    self.is_cancelled = True
+                    return False
             if code == 0:
                 LOGGER.info("FFmpeg succeeded")
                 return True
@@ -31,7 +31,12 @@ from .services import start, ping, log
 from .shell import run_shell
 from .stats import bot_stats, get_packages_version
 from .status import task_status, status_pages
-from .users_settings import get_users_settings, edit_user_settings, send_user_settings
+from .users_settings import (
+    get_users_settings,
+    edit_user_settings,
+    send_user_settings,
+    load_user_data,
+)
 from .ytdlp import ytdl, ytdl_leech
 
 __all__ = [
@@ -86,6 +91,7 @@ __all__ = [
     "get_users_settings",
     "edit_user_settings",
     "send_user_settings",
+    "load_user_data",
     "ytdl",
     "ytdl_leech",
 ]
@@ -24,6 +24,7 @@ async def authorize(_, message):
             if message.topic_message:
                 thread_id = message.message_thread_id
             chat_id = message.chat.id
+        await database.load_user(chat_id)
         if chat_id in user_data and user_data[chat_id].get("AUTH"):
             if (
                 thread_id is not None
@@ -68,6 +69,7 @@ async def unauthorize(_, message):
             if message.topic_message:
                 thread_id = message.message_thread_id
             chat_id = message.chat.id
+        await database.load_user(chat_id)
         if chat_id in user_data and user_data[chat_id].get("AUTH"):
             if thread_id is not None and thread_id in user_data[chat_id].get(
                 "thread_ids", []
@@ -94,6 +96,7 @@ async def add_sudo(_, message):
         elif reply_to := message.reply_to_message:
             id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
         if id_:
+            await database.load_user(id_)
             if id_ in user_data and user_data[id_].get("SUDO"):
                 msg = "Already Sudo!"
             else:
@@ -117,6 +120,7 @@ async def remove_sudo(_, message):
         elif reply_to := message.reply_to_message:
             id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
         if id_:
+            await database.load_user(id_)
             if id_ in user_data and user_data[id_].get("SUDO"):
                 update_user_ldata(id_, "SUDO", False)
                 await database.update_user_data(id_)
@@ -329,7 +329,9 @@ class Mirror(TaskListener):
             content_type = await get_content_type(self.link)
             if content_type is None or re_match(r"text/html|text/plain", content_type):
                 try:
-                    self.link = await sync_to_async(direct_link_generator, self.link)
+                    self.link = await sync_to_async(
+                        direct_link_generator, self.link, pool="transfer"
+                    )
                     if isinstance(self.link, tuple):
                         self.link, headers = self.link
                     elif isinstance(self.link, str):
@@ -93,12 +93,16 @@ async def confirm_restart(_, query):
         await TgClient.stop()
         if scheduler.running:
             scheduler.shutdown(wait=False)
+        if aria2 := intervals["aria2"]:
+            aria2.cancel()
         if qb := intervals["qb"]:
             qb.cancel()
         if jd := intervals["jd"]:
             jd.cancel()
         if nzb := intervals["nzb"]:
             nzb.cancel()
+        if snapshot := intervals["snapshot"]:
+            snapshot.cancel()
         if st := intervals["status"]:
             for intvl in list(st.values()):
                 intvl.cancel()
@@ -133,6 +137,7 @@ async def confirm_restart(_, query):
         await gather(proc1.wait(), proc2.wait())
         async with aiopen(".restartmsg", "w") as f:
             await f.write(f"{restart_message.chat.id}\n{restart_message.id}\n")
+        await database.disconnect()
         osexecl(executable, executable, "-m", "bot")
     else:
         await delete_message(message)
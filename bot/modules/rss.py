@@ -1,18 +1,24 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits
 from apscheduler.triggers.interval import IntervalTrigger
-from asyncio import Lock, sleep
+from asyncio import Lock, Semaphore, gather, sleep
 from datetime import datetime, timedelta
 from feedparser import parse as feed_parse
-from functools import partial
+from functools import partial, lru_cache
 from io import BytesIO
 from pyrogram.filters import create
 from pyrogram.handlers import MessageHandler
 from time import time
-from re import compile, I
+from re import compile, escape, I
+from urllib.parse import urlparse
 
 from .. import scheduler, rss_dict, LOGGER
 from ..core.config_manager import Config
-from ..helper.ext_utils.bot_utils import new_task, arg_parser, get_size_bytes
+from ..helper.ext_utils.bot_utils import (
+    new_task,
+    arg_parser,
+    get_size_bytes,
+    sync_to_async,
+)
 from ..helper.ext_utils.status_utils import get_readable_file_size
 from ..helper.ext_utils.db_handler import database
 from ..helper.ext_utils.exceptions import RssShutdownException
@@ -29,6 +35,10 @@ from ..helper.telegram_helper.message_utils import (
 
 rss_dict_lock = Lock()
 handler_dict = {}
+_client = None
+_host_slots = {}
+_validators = {}
+RSS_SEEN_LIMIT = 500
 size_regex = compile(r"(\d+(\.\d+)?\s?(GB|MB|KB|GiB|MiB|KiB))", I)
 
 headers = {
@@ -38,6 +48,83 @@ headers = {
 }
 
 
+def _entry_link(entry):
+    try:
+        return entry["links"][1]["href"]
+    except IndexError:
+        return entry["link"]
+
+
+def _entry_guid(entry):
+    return entry.get("id") or _entry_link(entry)
+
+
+def _entry_size(entry):
+    if entry.get("size"):
+        return int(entry["size"])
+    elif entry.get("summary"):
+        if sizes := size_regex.findall(entry["summary"]):
+            return get_size_bytes(sizes[0][0])
+    return 0
+
+
+def _merge_seen(guids, seen):
+    current = set(guids)
+    merged = guids + [guid for guid in seen or [] if guid not in current]
+    return merged[: max(RSS_SEEN_LIMIT, len(guids))]
+
+
+@lru_cache(maxsize=256)
+def _parse_feed(text):
+    feed = feed_parse(text)
+    feed.pop("bozo_exception", None)
+    return feed
+
+
+def _compile_filters(inf, exf, sensitive):
+    flags = I if sensitive else 0
+    inf = [compile("|".join(map(escape, words)), flags) for words in inf]
+    exf = [word for words in exf for word in words]
+    return inf, compile("|".join(map(escape, exf)), flags) if exf else None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = AsyncClient(
+            headers=headers,
+            follow_redirects=True,
+            timeout=60,
+            verify=False,
+            limits=Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def _fetch_feed(link, conditional=True):
+    req_headers = {}
+    if conditional and (validators := _validators.get(link)):
+        etag, modified = validators
+        if etag:
+            req_headers["If-None-Match"] = etag
+        if modified:
+            req_headers["If-Modified-Since"] = modified
+    async with _host_slots.setdefault(urlparse(link).netloc, Semaphore(4)):
+        tries = 0
+        while True:
+            try:
+                res = await _get_client().get(link, headers=req_headers)
+                break
+            except:
+                tries += 1
+                if tries > 3:
+                    raise
+    if res.status_code == 304:
+        return None, None
+    rss_d = await sync_to_async(_parse_feed, res.text, pool="cpu")
+    return rss_d, (res.headers.get("etag"), res.headers.get("last-modified"))
+
+
 async def rss_menu(event):
     user_id = event.from_user.id
     buttons = ButtonMaker()
@@ -133,43 +220,27 @@ async def rss_sub(_, message, pre_event):
             cmd = None
             stv = False
         try:
-            async with AsyncClient(
-                headers=headers, follow_redirects=True, timeout=60, verify=False
-            ) as client:
-                res = await client.get(feed_link)
-            html = res.text
-            rss_d = feed_parse(html)
+            rss_d, _ = await _fetch_feed(feed_link, False)
             last_title = rss_d.entries[0]["title"]
-            if rss_d.entries[0].get("size"):
-                size = int(rss_d.entries[0]["size"])
-            elif rss_d.entries[0].get("summary"):
-                summary = rss_d.entries[0]["summary"]
-                matches = size_regex.findall(summary)
-                sizes = [match[0] for match in matches]
-                size = get_size_bytes(sizes[0])
-            else:
-                size = 0
+            size = _entry_size(rss_d.entries[0])
             msg += "<b>Subscribed!</b>"
             msg += f"\n<b>Title: </b><code>{title}</code>\n<b>Feed Url: </b>{feed_link}"
             msg += f"\n<b>latest record for </b>{rss_d.feed.title}:"
             msg += (
                 f"\nName: <code>{last_title.replace('>', '').replace('<', '')}</code>"
             )
-            try:
-                last_link = rss_d.entries[0]["links"][1]["href"]
-            except IndexError:
-                last_link = rss_d.entries[0]["link"]
+            last_link = _entry_link(rss_d.entries[0])
             msg += f"\n<b>Link: </b><code>{last_link}</code>"
             if size:
                 msg += f"\nSize: {get_readable_file_size(size)}"
             msg += f"\n<b>Command: </b><code>{cmd}</code>"
             msg += f"\n<b>Filters:-</b>\ninf: <code>{inf}</code>\nexf: <code>{exf}</code>\n<b>sensitive: </b>{stv}"
+            guids = [_entry_guid(entry) for entry in rss_d.entries]
             async with rss_dict_lock:
                 if rss_dict.get(user_id, False):
                     rss_dict[user_id][title] = {
                         "link": feed_link,
-                        "last_feed": last_link,
-                        "last_title": last_title,
+                        "seen": _merge_seen(guids, None),
                         "inf": inf_lists,
                         "exf": exf_lists,
                         "paused": False,
@@ -181,8 +252,7 @@ async def rss_sub(_, message, pre_event):
                     rss_dict[user_id] = {
                         title: {
                             "link": feed_link,
-                            "last_feed": last_link,
-                            "last_title": last_title,
+                            "seen": _merge_seen(guids, None),
                             "inf": inf_lists,
                             "exf": exf_lists,
                             "paused": False,
@@ -346,12 +416,7 @@ async def rss_get(_, message, pre_event):
                 msg = await send_message(
                     message, f"Getting the last <b>{count}</b> item(s) from {title}"
                 )
-                async with AsyncClient(
-                    headers=headers, follow_redirects=True, timeout=60, verify=False
-                ) as client:
-                    res = await client.get(data["link"])
-                html = res.text
-                rss_d = feed_parse(html)
+                rss_d, _ = await _fetch_feed(data["link"], False)
                 item_info = ""
                 for item_num in range(count):
                     try:
@@ -658,6 +723,67 @@ Timeout: 60 sec. Argument -c for command and arguments
             await query.answer(text="Already Running!", show_alert=True)
 
 
+async def _process_feed(user, title, data, rss_d, rss_chat_id, rss_topic_id):
+    guids = [_entry_guid(entry) for entry in rss_d.entries]
+    seen = data.get("seen")
+    if seen is None:
+        legacy = (data.get("last_feed"), data.get("last_title"))
+        seen = set()
+        for index, entry in enumerate(rss_d.entries):
+            if _entry_link(entry) in legacy or entry.get("title") in legacy:
+                seen.update(guids[index:])
+                break
+        else:
+            seen.update(guids)
+    else:
+        seen = set(seen)
+        if seen.issuperset(guids):
+            return
+    inf, exf = _compile_filters(
+        tuple(map(tuple, data["inf"])),
+        tuple(map(tuple, data["exf"])),
+        data.get("sensitive", False),
+    )
+    for entry, guid in zip(rss_d.entries, guids):
+        if guid in seen:
+            continue
+        item_title = entry.get("title", "")
+        if not all(f.search(item_title) for f in inf) or (
+            exf and exf.search(item_title)
+        ):
+            continue
+        url = _entry_link(entry)
+        size = _entry_size(entry)
+        if command := data["command"]:
+            if size and Config.RSS_SIZE_LIMIT and Config.RSS_SIZE_LIMIT < size:
+                continue
+            cmd = command.split(maxsplit=1)
+            cmd.insert(1, url)
+            feed_msg = " ".join(cmd)
+            if not feed_msg.startswith("/"):
+                feed_msg = f"/{feed_msg}"
+        else:
+            feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
+            feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
+            if size:
+                feed_msg += f"\n<b>Size: </b>{get_readable_file_size(size)}"
+        feed_msg += f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
+        await send_rss(feed_msg, rss_chat_id, rss_topic_id)
+        try:
+            await sleep(3)
+        except:
+            raise RssShutdownException("Rss Monitor Stopped!")
+    async with rss_dict_lock:
+        if user not in rss_dict or not rss_dict[user].get(title, False):
+            return
+        rss_dict[user][title]["seen"] = _merge_seen(guids, data.get("seen"))
+        rss_dict[user][title].pop("last_feed", None)
+        rss_dict[user][title].pop("last_title", None)
+    await database.rss_update(user)
+    LOGGER.info(f"Feed Name: {title}")
+    LOGGER.info(f"Last item: {_entry_link(rss_d.entries[0])}")
+
+
 async def rss_monitor():
     chat = Config.RSS_CHAT
     if not chat:
@@ -667,7 +793,6 @@ async def rss_monitor():
     if len(rss_dict) == 0:
         scheduler.pause()
         return
-    all_paused = True
     rss_topic_id = rss_chat_id = None
     if isinstance(chat, int):
         rss_chat_id = chat
@@ -680,133 +805,38 @@ async def rss_monitor():
         )
     elif chat.lstrip("-").isdigit():
         rss_chat_id = int(chat)
+    feeds = {}
     for user, items in list(rss_dict.items()):
-        for title, data in items.items():
+        for title, data in list(items.items()):
+            if not data["paused"]:
+                feeds.setdefault(data["link"], []).append((user, title, data))
+    if not feeds:
+        scheduler.pause()
+        return
+    results = await gather(
+        *(_fetch_feed(link) for link in feeds), return_exceptions=True
+    )
+    for (link, subs), result in zip(feeds.items(), results):
+        if isinstance(result, Exception):
+            LOGGER.error(f"{result} - Feed Link: {link}")
+            continue
+        rss_d, validators = result
+        if rss_d is None:
+            continue
+        processed = True
+        for user, title, data in subs:
             try:
-                if data["paused"]:
-                    continue
-                tries = 0
-                while True:
-                    try:
-                        async with AsyncClient(
-                            headers=headers,
-                            follow_redirects=True,
-                            timeout=60,
-                            verify=False,
-                        ) as client:
-                            res = await client.get(data["link"])
-                        html = res.text
-                        break
-                    except:
-                        tries += 1
-                        if tries > 3:
-                            raise
-                        continue
-                rss_d = feed_parse(html)
-                try:
-                    last_link = rss_d.entries[0]["links"][1]["href"]
-                except IndexError:
-                    last_link = rss_d.entries[0]["link"]
-                finally:
-                    all_paused = False
-                last_title = rss_d.entries[0]["title"]
-                if data["last_feed"] == last_link or data["last_title"] == last_title:
-                    continue
-                feed_count = 0
-                while True:
-                    try:
-                        await sleep(10)
-                    except:
-                        raise RssShutdownException("Rss Monitor Stopped!")
-                    try:
-                        item_title = rss_d.entries[feed_count]["title"]
-                        try:
-                            url = rss_d.entries[feed_count]["links"][1]["href"]
-                        except IndexError:
-                            url = rss_d.entries[feed_count]["link"]
-                        if data["last_feed"] == url or data["last_title"] == item_title:
-                            break
-                        if rss_d.entries[feed_count].get("size"):
-                            size = int(rss_d.entries[feed_count]["size"])
-                        elif rss_d.entries[feed_count].get("summary"):
-                            summary = rss_d.entries[feed_count]["summary"]
-                            matches = size_regex.findall(summary)
-                            sizes = [match[0] for match in matches]
-                            size = get_size_bytes(sizes[0])
-                        else:
-                            size = 0
-                    except IndexError:
-                        LOGGER.warning(
-                            f"Reached Max index no. {feed_count} for this feed: {title}. Maybe you need to use less RSS_DELAY to not miss some torrents"
-                        )
-                        break
-                    parse = True
-                    for flist in data["inf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and all(x.lower() not in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and all(x not in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    for flist in data["exf"]:
-                        if (
-                            data.get("sensitive", False)
-                            and any(x.lower() in item_title.lower() for x in flist)
-                        ) or (
-                            not data.get("sensitive", False)
-                            and any(x in item_title for x in flist)
-                        ):
-                            parse = False
-                            feed_count += 1
-                            break
-                    if not parse:
-                        continue
-                    if command := data["command"]:
-                        if (
-                            size
-                            and Config.RSS_SIZE_LIMIT
-                            and Config.RSS_SIZE_LIMIT < size
-                        ):
-                            feed_count += 1
-                            continue
-                        cmd = command.split(maxsplit=1)
-                        cmd.insert(1, url)
-                        feed_msg = " ".join(cmd)
-                        if not feed_msg.startswith("/"):
-                            feed_msg = f"/{feed_msg}"
-                    else:
-                        feed_msg = f"<b>Name: </b><code>{item_title.replace('>', '').replace('<', '')}</code>"
-                        feed_msg += f"\n\n<b>Link: </b><code>{url}</code>"
-                        if size:
-                            feed_msg += f"\n<b>Size: </b>{get_readable_file_size(size)}"
-                    feed_msg += (
-                        f"\n<b>Tag: </b><code>{data['tag']}</code> <code>{user}</code>"
-                    )
-                    await send_rss(feed_msg, rss_chat_id, rss_topic_id)
-                    feed_count += 1
-                async with rss_dict_lock:
-                    if user not in rss_dict or not rss_dict[user].get(title, False):
-                        continue
-                    rss_dict[user][title].update(
-                        {"last_feed": last_link, "last_title": last_title}
-                    )
-                await database.rss_update(user)
-                LOGGER.info(f"Feed Name: {title}")
-                LOGGER.info(f"Last item: {last_link}")
+                await _process_feed(
+                    user, title, data, rss_d, rss_chat_id, rss_topic_id
+                )
             except RssShutdownException as ex:
                 LOGGER.info(ex)
-                break
+                return
             except Exception as e:
-                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {data['link']}")
-                continue
-    if all_paused:
-        scheduler.pause()
+                processed = False
+                LOGGER.error(f"{e} - Feed Name: {title} - Feed Link: {link}")
+        if processed:
+            _validators[link] = validators
 
 
 def add_job():
@@ -14,8 +14,11 @@ from psutil import (
 
 from .. import bot_start_time
 from ..helper.ext_utils.status_utils import get_readable_file_size, get_readable_time
-from ..helper.ext_utils.bot_utils import cmd_exec, new_task
+from ..helper.ext_utils.bot_utils import cmd_exec, new_task, POOLS
 from ..helper.telegram_helper.message_utils import send_message
+from ..helper.ext_utils.db_handler import database
+from ..core.config_manager import Config
+from ..core.startup import startup_times
 
 commands = {
     "aria2": (["aria2c", "--version"], r"aria2 version ([\d.]+)"),
@@ -67,6 +70,20 @@ async def bot_stats(_, message):
 <b>ffmpeg:</b> {commands["ffmpeg"]}
 <b>7z:</b> {commands["7z"]}
 """
+    for pool in POOLS.values():
+        stats += (
+            f"\n<b>{pool.name.upper()} Pool:</b> {pool.inflight}/{pool.workers}"
+            f" | <b>Queued:</b> {pool.queued} | <b>Latency:</b> {pool.latency:.2f}s"
+        )
+    if Config.DATABASE_URL:
+        stats += (
+            f"\n<b>DB Queue:</b> {database.queue_depth} | <b>Flushed:</b> {database.flushed}"
+            f" | <b>Flush Latency:</b> {database.flush_latency:.2f}s"
+        )
+    if startup_times:
+        stats += "\n\n<b>Startup:</b> " + " | ".join(
+            f"{name} {took:.2f}s" for name, took in startup_times.items()
+        )
     await send_message(message, stats)
 
 
@@ -1,6 +1,5 @@
-from psutil import cpu_percent, virtual_memory, disk_usage
 from time import time
-from asyncio import gather, iscoroutinefunction
+from asyncio import gather
 
 from .. import (
     task_dict_lock,
@@ -9,15 +8,17 @@ from .. import (
     bot_start_time,
     intervals,
     sabnzbd_client,
-    DOWNLOAD_DIR,
 )
 from ..core.torrent_manager import TorrentManager
 from ..core.jdownloader_booter import jdownloader
 from ..helper.ext_utils.bot_utils import new_task
+from ..helper.ext_utils.task_manager import get_queue_overview
 from ..helper.ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
+    get_system_stats,
+    get_task_status,
     speed_string_to_bytes,
 )
 from ..helper.telegram_helper.bot_commands import BotCommands
@@ -38,11 +39,11 @@ async def task_status(_, message):
         count = len(task_dict)
     if count == 0:
         currentTime = get_readable_time(time() - bot_start_time)
-        free = get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)
+        stats = get_system_stats()
         msg = f"No Active Tasks!\nEach user can get status for his tasks by adding me or user_id after cmd: /{BotCommands.StatusCommand} me"
         msg += (
-            f"\n<b>CPU:</b> {cpu_percent()}% | <b>FREE:</b> {free}"
-            f"\n<b>RAM:</b> {virtual_memory().percent}% | <b>UPTIME:</b> {currentTime}"
+            f"\n<b>CPU:</b> {stats['cpu']}% | <b>FREE:</b> {stats['free']}"
+            f"\n<b>RAM:</b> {stats['ram']}% | <b>UPTIME:</b> {currentTime}"
         )
         reply_message = await send_message(message, msg)
         await auto_delete_message(message, reply_message)
@@ -71,11 +72,7 @@ async def get_download_status(download):
         speed = download.speed()
     else:
         speed = 0
-    return (
-        await download.status()
-        if iscoroutinefunction(download.status)
-        else download.status()
-    ), speed
+    return await get_task_status(download), speed
 
 
 @new_task
@@ -130,51 +127,53 @@ async def status_pages(_, query):
         dl_speed = ds
         up_speed = 0
         seed_speed = ss
-        async with task_dict_lock:
-            status_results = await gather(
-                *(get_download_status(download) for download in task_dict.values())
-            )
-            for status, speed in status_results:
-                match status:
-                    case MirrorStatus.STATUS_DOWNLOAD:
-                        tasks["Download"] += 1
-                        if speed:
-                            dl_speed += speed_string_to_bytes(speed)
-                    case MirrorStatus.STATUS_UPLOAD:
-                        tasks["Upload"] += 1
-                        up_speed += speed_string_to_bytes(speed)
-                    case MirrorStatus.STATUS_SEED:
-                        tasks["Seed"] += 1
-                    case MirrorStatus.STATUS_ARCHIVE:
-                        tasks["Archive"] += 1
-                    case MirrorStatus.STATUS_EXTRACT:
-                        tasks["Extract"] += 1
-                    case MirrorStatus.STATUS_SPLIT:
-                        tasks["Split"] += 1
-                    case MirrorStatus.STATUS_QUEUEDL:
-                        tasks["QueueDl"] += 1
-                    case MirrorStatus.STATUS_QUEUEUP:
-                        tasks["QueueUp"] += 1
-                    case MirrorStatus.STATUS_CLONE:
-                        tasks["Clone"] += 1
-                    case MirrorStatus.STATUS_CHECK:
-                        tasks["CheckUp"] += 1
-                    case MirrorStatus.STATUS_PAUSED:
-                        tasks["Pause"] += 1
-                    case MirrorStatus.STATUS_SAMVID:
-                        tasks["SamVid"] += 1
-                    case MirrorStatus.STATUS_CONVERT:
-                        tasks["ConvertMedia"] += 1
-                    case MirrorStatus.STATUS_FFMPEG:
-                        tasks["FFMPEG"] += 1
-                    case _:
-                        tasks["Download"] += 1
+        status_results = await gather(
+            *(get_download_status(download) for download in list(task_dict.values()))
+        )
+        for status, speed in status_results:
+            match status:
+                case MirrorStatus.STATUS_DOWNLOAD:
+                    tasks["Download"] += 1
+                    if speed:
+                        dl_speed += speed_string_to_bytes(speed)
+                case MirrorStatus.STATUS_UPLOAD:
+                    tasks["Upload"] += 1
+                    up_speed += speed_string_to_bytes(speed)
+                case MirrorStatus.STATUS_SEED:
+                    tasks["Seed"] += 1
+                case MirrorStatus.STATUS_ARCHIVE:
+                    tasks["Archive"] += 1
+                case MirrorStatus.STATUS_EXTRACT:
+                    tasks["Extract"] += 1
+                case MirrorStatus.STATUS_SPLIT:
+                    tasks["Split"] += 1
+                case MirrorStatus.STATUS_QUEUEDL:
+                    tasks["QueueDl"] += 1
+                case MirrorStatus.STATUS_QUEUEUP:
+                    tasks["QueueUp"] += 1
+                case MirrorStatus.STATUS_CLONE:
+                    tasks["Clone"] += 1
+                case MirrorStatus.STATUS_CHECK:
+                    tasks["CheckUp"] += 1
+                case MirrorStatus.STATUS_PAUSED:
+                    tasks["Pause"] += 1
+                case MirrorStatus.STATUS_SAMVID:
+                    tasks["SamVid"] += 1
+                case MirrorStatus.STATUS_CONVERT:
+                    tasks["ConvertMedia"] += 1
+                case MirrorStatus.STATUS_FFMPEG:
+                    tasks["FFMPEG"] += 1
+                case _:
+                    tasks["Download"] += 1
 
+        queued_users, next_tasks = get_queue_overview()
         msg = f"""<b>DL:</b> {tasks['Download']} | <b>UP:</b> {tasks['Upload']} | <b>SD:</b> {tasks['Seed']} | <b>AR:</b> {tasks['Archive']}
 <b>EX:</b> {tasks['Extract']} | <b>SP:</b> {tasks['Split']} | <b>QD:</b> {tasks['QueueDl']} | <b>QU:</b> {tasks['QueueUp']}
 <b>CL:</b> {tasks['Clone']} | <b>CK:</b> {tasks['CheckUp']} | <b>PA:</b> {tasks['Pause']} | <b>SV:</b> {tasks['SamVid']}
 <b>CM:</b> {tasks['ConvertMedia']} | <b>FF:</b> {tasks['FFmpeg']}
 
+<b>QU-Users:</b> {queued_users} | <b>Next:</b> {next_tasks}
+
 <b>ODLS:</b> {get_readable_file_size(dl_speed)}/s
 <b>OULS:</b> {get_readable_file_size(up_speed)}/s
 <b>OSDS:</b> {get_readable_file_size(seed_speed)}/s
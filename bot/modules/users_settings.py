@@ -6,6 +6,7 @@ from io import BytesIO
 from os import getcwd
 from pyrogram.filters import create
 from pyrogram.handlers import MessageHandler
+from pyrogram.types import CallbackQuery
 from time import time
 from re import findall
 
@@ -707,6 +708,14 @@ async def edit_user_settings(client, query):
         await delete_message(message)
 
 
+async def load_user_data(_, update):
+    if isinstance(update, CallbackQuery):
+        user, chat = update.from_user, update.message and update.message.chat
+    else:
+        user, chat = update.from_user or update.sender_chat, update.chat
+    await database.load_user(user and user.id, chat and chat.id)
+
+
 @new_task
 async def get_users_settings(_, message):
     msg = ""
@@ -714,8 +723,11 @@ async def get_users_settings(_, message):
         msg += f"AUTHORIZED_CHATS: {auth_chats}\n"
     if sudo_users:
         msg += f"SUDO_USERS: {sudo_users}\n\n"
-    if user_data:
-        for u, d in user_data.items():
+    users = user_data
+    if database.db is not None:
+        users = await database.get_all_users() | user_data
+    if users:
+        for u, d in users.items():
             kmsg = f"\n<b>{u}:</b>\n"
             if vmsg := "".join(
                 f"{k}: <code>{v or None}</code>\n" for k, v in d.items()
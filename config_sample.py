@@ -10,6 +10,7 @@ CMD_SUFFIX = ""
 AUTHORIZED_CHATS = ""
 SUDO_USERS = ""
 DATABASE_URL = ""
+USER_CACHE_SIZE = 1000
 STATUS_LIMIT = 4
 DEFAULT_UPLOAD = "rc"
 STATUS_UPDATE_INTERVAL = 15
@@ -22,9 +23,14 @@ USE_SERVICE_ACCOUNTS = False
 NAME_SUBSTITUTE = ""
 FFMPEG_CMDS = {}
 UPLOAD_PATHS = {}
+CONCURRENT_EXTRACTIONS = 1
+ARCHIVE_LEVEL = 0
+ARCHIVE_THREADS = 0
 # GDrive Tools
 GDRIVE_ID = ""
 IS_TEAM_DRIVE = False
+GDRIVE_CONCURRENT_UPLOADS = 1
+GDRIVE_CONCURRENT_CLONES = 1
 STOP_DUPLICATE = False
 INDEX_URL = ""
 # Rclone
@@ -73,9 +79,13 @@ USER_TRANSMISSION = False
 HYBRID_LEECH = False
 LEECH_FILENAME_PREFIX = ""
 LEECH_DUMP_CHAT = ""
+LEECH_STREAMING = False
+LEECH_CONCURRENT_UPLOADS = 1
+LEECH_VIRTUAL_SPLIT = False
 THUMBNAIL_LAYOUT = ""
 # qBittorrent/Aria2c
 TORRENT_TIMEOUT = 0
+DIRECT_CONCURRENT_DOWNLOADS = 1
 BASE_URL = ""
 BASE_URL_PORT = 0
 WEB_PINCODE = False
@@ -83,6 +93,9 @@ WEB_PINCODE = False
 QUEUE_ALL = 0
 QUEUE_DOWNLOAD = 0
 QUEUE_UPLOAD = 0
+QUEUE_USER_LIMIT = 0
+QUEUE_SMALL_FIRST = False
+STORAGE_THRESHOLD = 0
 # RSS
 RSS_DELAY = 600
 RSS_CHAT = ""